@@ -0,0 +1,195 @@
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from models.user_profile import UserProfile
+from models.profile_store import ProfileStore, ProfileView
+from models.vocabulary import Vocabulary, mask_to_words, masks_word_count, popcount
+
+
+class CandidateBatch:
+    """Columnar encoding of a candidate pool for vectorized compatibility scoring.
+
+    Every scorer takes a single query profile and returns one score per candidate,
+    matching the per-pair scorers on ProfileDiscoveryEngine.
+    """
+
+    def __init__(self, universities: np.ndarray, degrees: np.ndarray, cities: np.ndarray,
+                 graduation_years: np.ndarray, ages: np.ndarray, interest_words: np.ndarray,
+                 vocabularies: Dict[str, Vocabulary], store: ProfileStore = None):
+        self.universities = universities
+        self.degrees = degrees
+        self.cities = cities
+        self.graduation_years = graduation_years.astype(np.int32)
+        self.ages = ages.astype(np.int32)
+        self.interest_words = interest_words
+        self.interest_counts = popcount(interest_words)
+
+        self.vocabularies = vocabularies
+        self.store = store
+
+    @classmethod
+    def from_profiles(cls, candidates: Sequence[UserProfile]) -> 'CandidateBatch':
+        """Encode a list of profiles into a new batch."""
+        vocabularies = {field: Vocabulary() for field in ('university', 'degree', 'city')}
+
+        def encode(field: str) -> np.ndarray:
+            vocabulary = vocabularies[field]
+            return np.array([vocabulary.intern(getattr(c, field)) for c in candidates], dtype=np.int32)
+
+        n_words = masks_word_count(candidate.interest_mask for candidate in candidates)
+        interest_words = np.zeros((len(candidates), n_words), dtype=np.uint64)
+        for row, candidate in enumerate(candidates):
+            interest_words[row] = mask_to_words(candidate.interest_mask, n_words)
+
+        return cls(
+            universities=encode('university'),
+            degrees=encode('degree'),
+            cities=encode('city'),
+            graduation_years=np.array([c.graduation_year for c in candidates], dtype=np.int32),
+            ages=np.array([c.age for c in candidates], dtype=np.int32),
+            interest_words=interest_words,
+            vocabularies=vocabularies,
+        )
+
+    @classmethod
+    def from_store(cls, store: ProfileStore, rows: np.ndarray) -> 'CandidateBatch':
+        """Gather a batch directly from ProfileStore columns without re-encoding."""
+        return cls(
+            universities=store.codes['university'][rows],
+            degrees=store.codes['degree'][rows],
+            cities=store.codes['city'][rows],
+            graduation_years=store.graduation_years[rows],
+            ages=store.ages[rows],
+            interest_words=store.interest_words[rows],
+            vocabularies={field: store.vocabularies[field] for field in ('university', 'degree', 'city')},
+            store=store,
+        )
+
+    def __len__(self) -> int:
+        return len(self.universities)
+
+    def _query_interests(self, user: UserProfile) -> Tuple[np.ndarray, int]:
+        """Return the user's interest bitmask words at the batch width and its interest count."""
+        if isinstance(user, ProfileView) and user.store is self.store:
+            words = self.store.interest_words[user.row]
+            return words[:self.interest_words.shape[1]], int(popcount(words))
+
+        # Bits beyond the batch width belong to interests no candidate has
+        mask = user.interest_mask
+        return mask_to_words(mask, self.interest_words.shape[1]), mask.bit_count()
+
+    def _academic(self, university_code, degree_code, graduation_year) -> np.ndarray:
+        """Academic similarity against query codes that broadcast over the candidate axis."""
+        score = np.where(self.universities == university_code, 0.4, 0.0)
+        score = score + np.where(self.degrees == degree_code, 0.3, 0.0)
+
+        year_difference = np.abs(self.graduation_years - graduation_year)
+        score = score + np.where(year_difference <= 1, 0.3 * (1 - year_difference / 2), 0.0)
+
+        return np.minimum(score, 1.0)
+
+    def _interest(self, query_words: np.ndarray, query_count) -> np.ndarray:
+        """Interest compatibility against query bitmask words that broadcast over the candidate axis."""
+        intersection_count = popcount(self.interest_words & query_words)
+        union_count = self.interest_counts + query_count - intersection_count
+        smaller_count = np.minimum(self.interest_counts, query_count)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            jaccard_score = intersection_count / union_count
+            overlap_ratio = intersection_count / smaller_count
+
+        # Same diversity penalties as the per-pair scorer
+        identical = (intersection_count == self.interest_counts) & (intersection_count == query_count)
+        diversity_multiplier = np.where(identical, 0.7, np.where(overlap_ratio > 0.8, 0.85, 1.0))
+
+        has_interests = (self.interest_counts > 0) & (query_count > 0)
+        return np.where(has_interests, jaccard_score * diversity_multiplier, 0.0)
+
+    def academic_similarity(self, user: UserProfile) -> np.ndarray:
+        """Vectorized calculate_academic_similarity against every candidate."""
+        return self._academic(
+            self.vocabularies['university'].code(user.university),
+            self.vocabularies['degree'].code(user.degree),
+            user.graduation_year
+        )
+
+    def interest_compatibility(self, user: UserProfile) -> np.ndarray:
+        """Vectorized calculate_interest_compatibility against every candidate."""
+        query_words, user_interest_count = self._query_interests(user)
+        if user_interest_count == 0:
+            return np.zeros(len(self))
+
+        return self._interest(query_words, user_interest_count)
+
+    def geographic_score(self, user: UserProfile) -> np.ndarray:
+        """Vectorized calculate_geographic_score against every candidate."""
+        return np.where(self.cities == self.vocabularies['city'].code(user.city), 0.8, 0.0)
+
+    def profile_similarity(self, user: UserProfile) -> np.ndarray:
+        """Vectorized calculate_profile_similarity against every candidate."""
+        return self.academic_similarity(user) * 0.4 + self.interest_compatibility(user) * 0.6
+
+    def _stacked(self, scorer, store: ProfileStore, rows: np.ndarray) -> np.ndarray:
+        """Apply a single-profile scorer to each stored profile, stacking one row per profile."""
+        if len(rows) == 0:
+            return np.zeros((0, len(self)))
+        return np.stack([scorer(store.view(row)) for row in rows])
+
+    def academic_similarity_rows(self, store: ProfileStore, rows: np.ndarray) -> np.ndarray:
+        """Academic similarity of several stored profiles against every candidate (rows x candidates)."""
+        if store is not self.store or len(rows) == 0:
+            return self._stacked(self.academic_similarity, store, rows)
+
+        return self._academic(
+            store.codes['university'][rows][:, None],
+            store.codes['degree'][rows][:, None],
+            store.graduation_years[rows].astype(np.int32)[:, None]
+        )
+
+    def interest_compatibility_rows(self, store: ProfileStore, rows: np.ndarray) -> np.ndarray:
+        """Interest compatibility of several stored profiles against every candidate (rows x candidates)."""
+        if store is not self.store or len(rows) == 0:
+            return self._stacked(self.interest_compatibility, store, rows)
+
+        query_words = store.interest_words[rows][:, None, :self.interest_words.shape[1]]
+        query_counts = popcount(store.interest_words[rows])[:, None]
+        return self._interest(query_words, query_counts)
+
+    def geographic_score_rows(self, store: ProfileStore, rows: np.ndarray) -> np.ndarray:
+        """Geographic score of several stored profiles against every candidate (rows x candidates)."""
+        if store is not self.store or len(rows) == 0:
+            return self._stacked(self.geographic_score, store, rows)
+
+        return np.where(self.cities == store.codes['city'][rows][:, None], 0.8, 0.0)
+
+    def profile_similarity_rows(self, store: ProfileStore, rows: np.ndarray) -> np.ndarray:
+        """Profile similarity of several stored profiles against every candidate (rows x candidates).
+
+        Computed in one broadcast when the batch was gathered from the same store.
+        """
+        return (
+            self.academic_similarity_rows(store, rows) * 0.4 +
+            self.interest_compatibility_rows(store, rows) * 0.6
+        )
+
+    def demographic_similarity_rows(self, store: ProfileStore, rows: np.ndarray) -> np.ndarray:
+        """Demographic similarity of several stored profiles against every candidate (rows x candidates)."""
+        if store is not self.store or len(rows) == 0:
+            return self._stacked(self.demographic_similarity, store, rows)
+
+        age_difference = np.abs(self.ages - store.ages[rows].astype(np.int32)[:, None])
+        score = np.where(age_difference <= 2, 0.3 * (1 - age_difference / 5), 0.0)
+        score = score + self.academic_similarity_rows(store, rows) * 0.5
+        score = score + self.interest_compatibility_rows(store, rows) * 0.2
+
+        return np.minimum(score, 1.0)
+
+    def demographic_similarity(self, user: UserProfile) -> np.ndarray:
+        """Vectorized calculate_demographic_similarity against every candidate."""
+        age_difference = np.abs(self.ages - user.age)
+        score = np.where(age_difference <= 2, 0.3 * (1 - age_difference / 5), 0.0)
+        score = score + self.academic_similarity(user) * 0.5
+        score = score + self.interest_compatibility(user) * 0.2
+
+        return np.minimum(score, 1.0)
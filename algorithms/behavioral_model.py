@@ -0,0 +1,93 @@
+from collections import deque
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+from models.profile_store import ProfileStore
+
+
+class FeedbackWindow(NamedTuple):
+    """Store rows of the recent feedback that behavioral and diversity scoring look at."""
+
+    like_rows: np.ndarray
+    diversity_mask: np.ndarray  # Which like_rows fall inside the diversity window
+    dislike_rows: np.ndarray
+
+
+class BehavioralModel:
+    """Incrementally maintained summary of a user's recent likes and dislikes.
+
+    Holds the same windows calculate_behavioral_match and calculate_diversity_bonus
+    read from the full history, and caches them as store rows so a candidate batch
+    can be scored against all of them in one broadcast. Also keeps the set of
+    profiles the user has already seen.
+    """
+
+    LIKE_WINDOW = 10
+    DISLIKE_WINDOW = 5
+    DIVERSITY_WINDOW = 5
+
+    def __init__(self, liked_profiles: List[str], disliked_profiles: List[str]):
+        self.recent_likes = deque(liked_profiles[-self.LIKE_WINDOW:], maxlen=self.LIKE_WINDOW)
+        self.recent_dislikes = deque(disliked_profiles[-self.DISLIKE_WINDOW:], maxlen=self.DISLIKE_WINDOW)
+        self.like_count = len(liked_profiles)
+        self.dislike_count = len(disliked_profiles)
+
+        # Every profile the user has already swiped on, for candidate filtering
+        self.seen_profile_ids = set(liked_profiles)
+        self.seen_profile_ids.update(disliked_profiles)
+
+        # Bumped on every recorded like or dislike
+        self.version = 0
+
+        self._window: Optional[FeedbackWindow] = None
+        self._window_key = None
+
+    @property
+    def has_likes(self) -> bool:
+        return self.like_count > 0
+
+    def is_current(self, liked_profiles: List[str], disliked_profiles: List[str]) -> bool:
+        """Whether the model still reflects the user's feedback lists."""
+        return self.like_count == len(liked_profiles) and self.dislike_count == len(disliked_profiles)
+
+    def record(self, candidate_id: str, liked: bool):
+        """Add one piece of feedback in O(1)."""
+        if liked:
+            self.recent_likes.append(candidate_id)
+            self.like_count += 1
+        else:
+            self.recent_dislikes.append(candidate_id)
+            self.dislike_count += 1
+        self.seen_profile_ids.add(candidate_id)
+        self.version += 1
+
+    def window(self, store: ProfileStore) -> FeedbackWindow:
+        """Resolve the feedback windows to store rows, skipping users that are not registered.
+
+        Cached until new feedback arrives or the store changes.
+        """
+        window_key = (self.version, id(store), store.revision)
+        if self._window is not None and self._window_key == window_key:
+            return self._window
+
+        like_rows = []
+        diversity_mask = []
+        diversity_start = len(self.recent_likes) - self.DIVERSITY_WINDOW
+        for position, liked_user_id in enumerate(self.recent_likes):
+            if liked_user_id in store:
+                like_rows.append(store.row(liked_user_id))
+                diversity_mask.append(position >= diversity_start)
+
+        dislike_rows = [
+            store.row(disliked_user_id) for disliked_user_id in self.recent_dislikes
+            if disliked_user_id in store
+        ]
+
+        self._window = FeedbackWindow(
+            like_rows=np.array(like_rows, dtype=np.int64),
+            diversity_mask=np.array(diversity_mask, dtype=bool),
+            dislike_rows=np.array(dislike_rows, dtype=np.int64)
+        )
+        self._window_key = window_key
+        return self._window
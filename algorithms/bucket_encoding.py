@@ -0,0 +1,174 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from models.user_profile import UserProfile
+from models.vocabulary import Vocabulary, masks_to_words, masks_word_count, popcount
+
+
+class BucketEncoding:
+    """Columnar encoding of one constraint bucket, indexed by each user's position in the bucket.
+
+    Built once per bucket. Holds the member attributes group scoring reads, so many
+    candidate groups can be scored at once from a (num_groups x group_size) array of
+    positions. The component scorers match the per-group scorers on GroupDiningMatcher.
+
+    The n x n shared-interest matrix is built lazily. shared_interest_rows (used by
+    ExactGroupSolver) always builds it. conversation_potential builds it only when a
+    call covers at least as many member pairs as the matrix has cells, and otherwise
+    compares each group's interest words directly. Large sampled buckets and the
+    baseline partition therefore never build it.
+    """
+
+    def __init__(self, users: List[UserProfile]):
+        self.users = users
+        self.positions: Dict[str, int] = {user.user_id: position for position, user in enumerate(users)}
+
+        interest_masks = [user.interest_mask for user in users]
+        self.interest_words = masks_to_words(interest_masks, masks_word_count(interest_masks))
+        # Pairwise matrices, quadratic in the bucket size and so only built once some scoring needs them
+        self._shared_interest_counts = None
+        self._shares_interest = None
+        self._shared_interest_rows = None
+
+        # Per-user interest mention counts over the bucket's own interest vocabulary
+        mentions = [interest for user in users for interest in user.interests]
+        mention_codes = self._encode(mentions).astype(np.int64)
+        mention_positions = np.repeat(np.arange(len(users)), [len(user.interests) for user in users])
+        vocabulary_size = int(mention_codes.max()) + 1 if len(mentions) else 1
+        self.interest_mentions = np.bincount(
+            mention_positions * vocabulary_size + mention_codes, minlength=len(users) * vocabulary_size
+        ).astype(np.int32).reshape(len(users), vocabulary_size)
+
+        self.ages = np.array([user.age for user in users], dtype=np.float64)
+        self.genders = self._encode([user.gender for user in users])
+        self.universities = self._encode([user.university for user in users])
+        self.statuses = self._encode([user.relationship_status for user in users])
+        self.alcohol = np.array([bool(user.alcohol) for user in users], dtype=bool)
+        self.single = np.array([user.relationship_status == "single" for user in users], dtype=bool)
+
+    @staticmethod
+    def _encode(values: List[str]) -> np.ndarray:
+        vocabulary = Vocabulary()
+        return np.array([vocabulary.intern(value) for value in values], dtype=np.int32)
+
+    def _build_pairwise(self):
+        """n x n count of shared interests, from one broadcast AND + popcount over the interest words."""
+        interest_words = self.interest_words
+        self._shared_interest_counts = popcount(interest_words[:, None, :] & interest_words[None, :, :])
+        np.fill_diagonal(self._shared_interest_counts, 0)
+        self._shares_interest = self._shared_interest_counts > 0
+
+    @property
+    def shared_interest_counts(self) -> np.ndarray:
+        if self._shared_interest_counts is None:
+            self._build_pairwise()
+        return self._shared_interest_counts
+
+    @property
+    def shares_interest(self) -> np.ndarray:
+        if self._shared_interest_counts is None:
+            self._build_pairwise()
+        return self._shares_interest
+
+    @property
+    def shared_interest_rows(self) -> List[int]:
+        """Row i as a bitmask of the positions sharing at least one interest with user i."""
+        if self._shared_interest_rows is None:
+            self._shared_interest_rows = [
+                sum(1 << int(position) for position in np.flatnonzero(row))
+                for row in self.shares_interest
+            ]
+        return self._shared_interest_rows
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def group_mask(self, positions: Sequence[int]) -> int:
+        """Bitmask of bucket positions."""
+        mask = 0
+        for position in positions:
+            mask |= 1 << position
+        return mask
+
+    def shared_pair_count(self, positions: Sequence[int]) -> int:
+        """Number of member pairs sharing at least one interest."""
+        mask = self.group_mask(positions)
+        shared_rows = self.shared_interest_rows
+        return sum(bin(shared_rows[position] & mask).count("1") for position in positions) // 2
+
+    @staticmethod
+    def _value_counts(codes: np.ndarray) -> np.ndarray:
+        """Per-group count of each code, from a (groups x size) code array."""
+        code_count = int(codes.max()) + 1 if codes.size else 1
+        return (codes[:, :, None] == np.arange(code_count)).sum(axis=1)
+
+    def interest_diversity(self, positions: np.ndarray) -> np.ndarray:
+        """Normalized entropy of each group's interest distribution."""
+        counts = self.interest_mentions[positions].sum(axis=1)
+        total_mentions = counts.sum(axis=1)
+        distinct = (counts > 0).sum(axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            probabilities = counts / total_mentions[:, None]
+            entropy = -np.where(counts > 0, probabilities * np.log2(np.where(counts > 0, probabilities, 1.0)), 0.0).sum(axis=1)
+        max_possible_entropy = np.where(distinct > 1, np.log2(np.maximum(distinct, 1)), 1.0)
+        return np.where(total_mentions > 0, entropy / max_possible_entropy, 0.0)
+
+    def conversation_potential(self, positions: np.ndarray) -> np.ndarray:
+        """Closeness of each group's shared-interest pair ratio to the 70% target."""
+        group_size = positions.shape[1]
+        if self._shared_interest_counts is None and len(positions) * group_size * group_size < len(self) ** 2:
+            # Fewer member pairs than the pairwise matrix holds: compare the members' interest words directly
+            member_words = self.interest_words[positions]
+            shares_interest = popcount(member_words[:, :, None, :] & member_words[:, None, :, :]) > 0
+            shares_interest[:, np.arange(group_size), np.arange(group_size)] = False
+        else:
+            shares_interest = self.shares_interest[positions[:, :, None], positions[:, None, :]]
+        shared_pairs = shares_interest.sum(axis=(1, 2)) / 2
+        total_possible_pairs = group_size * (group_size - 1) / 2
+        optimal_shared_ratio = 0.7
+        actual_shared_ratio = shared_pairs / total_possible_pairs if total_possible_pairs > 0 else shared_pairs * 0.0
+
+        excess_similarity = (actual_shared_ratio - optimal_shared_ratio) / (1.0 - optimal_shared_ratio)
+        return np.where(
+            actual_shared_ratio <= optimal_shared_ratio,
+            actual_shared_ratio / optimal_shared_ratio,
+            1.0 - (excess_similarity * 0.3)
+        )
+
+    def demographic_balance(self, positions: np.ndarray) -> np.ndarray:
+        """Age spread, gender balance, university mix and relationship status mix per group."""
+        group_size = positions.shape[1]
+        if group_size < 2:
+            return np.zeros(len(positions))
+
+        age_balance = np.minimum(np.std(self.ages[positions], axis=1) / 3.0, 1.0)
+
+        gender_counts = self._value_counts(self.genders[positions])
+        rarest_gender = np.where(gender_counts > 0, gender_counts, group_size + 1).min(axis=1)
+        gender_balance = 1.0 - np.abs(0.5 - rarest_gender / group_size) * 2
+
+        university_counts = self._value_counts(self.universities[positions])
+        university_balance = np.minimum((university_counts > 0).sum(axis=1) / 3.0, 1.0)
+
+        status_counts = self._value_counts(self.statuses[positions])
+        distinct_statuses = (status_counts > 0).sum(axis=1)
+        status_balance = np.where(
+            distinct_statuses > 1,
+            1.0 - (status_counts.max(axis=1) / group_size - 1 / np.maximum(distinct_statuses, 1)),
+            0.5
+        )
+
+        return age_balance * 0.3 + gender_balance * 0.3 + university_balance * 0.2 + status_balance * 0.2
+
+    def social_compatibility(self, positions: np.ndarray) -> np.ndarray:
+        """Alcohol and relationship status mix per group."""
+        group_size = positions.shape[1]
+        alcohol_ratio = self.alcohol[positions].sum(axis=1) / group_size
+        alcohol_compatibility = np.where((alcohol_ratio >= 0.3) & (alcohol_ratio <= 0.7), 1.0, 0.7)
+
+        single_ratio = self.single[positions].sum(axis=1) / group_size
+        relationship_compatibility = np.where((single_ratio >= 0.2) & (single_ratio <= 0.8), 1.0, 0.8)
+
+        return (alcohol_compatibility + relationship_compatibility) / 2
@@ -0,0 +1,157 @@
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from models.user_profile import UserProfile
+
+
+class MergedBucket:
+    """A constraint bucket and the relaxed constraints every member still satisfies."""
+
+    __slots__ = ('city', 'dietary_restrictions', 'budget_ranges', 'languages', 'users')
+
+    def __init__(self, constraint_key: Tuple, users: List[UserProfile]):
+        dietary_restrictions, budget_range, city, languages = constraint_key
+        self.city = city
+        self.dietary_restrictions = dietary_restrictions  # Strictest diet in the bucket
+        self.budget_ranges = (budget_range,)
+        self.languages: FrozenSet[str] = frozenset(languages)  # Spoken by every member
+        self.users = list(users)
+
+    def constraint_key(self) -> Tuple:
+        """Same layout as GroupDiningMatcher.get_constraint_key, with budget bands joined."""
+        return (
+            self.dietary_restrictions,
+            " / ".join(self.budget_ranges),
+            self.city,
+            tuple(sorted(self.languages))
+        )
+
+
+class BucketMerger:
+    """Merges constraint buckets too small to seat a group into compatible neighbours.
+
+    Two buckets are compatible when they are in the same city and share a
+    language, their budgets fall within two adjacent bands, and their diets can
+    be served together: the merged bucket takes the strictest diet, since a
+    vegan-friendly table works for a vegetarian or someone with no restriction.
+    Values outside the known diet and budget scales only merge with themselves.
+    """
+
+    BUDGET_BANDS = ("500-800", "800-1200", "1200+")
+    DIETARY_STRICTNESS = ("none", "vegetarian", "vegan")
+
+    def __init__(self, min_bucket_size: int = 6):
+        self.min_bucket_size = min_bucket_size
+
+    def merge(self, buckets: Dict[Tuple, List[UserProfile]]) -> Dict[Tuple, List[UserProfile]]:
+        """Merge small buckets and return every bucket that reaches min_bucket_size."""
+        merged_buckets = [MergedBucket(key, users) for key, users in buckets.items()]
+
+        # (city, language) -> positions of live buckets whose members all speak it
+        language_index = defaultdict(set)
+        for position, bucket in enumerate(merged_buckets):
+            for language in bucket.languages:
+                language_index[(bucket.city, language)].add(position)
+
+        # Largest small buckets first, as they need the fewest merges
+        seeds = sorted(
+            (position for position, bucket in enumerate(merged_buckets)
+             if len(bucket.users) < self.min_bucket_size),
+            key=lambda position: -len(merged_buckets[position].users)
+        )
+        absorbed = set()
+
+        for seed in seeds:
+            if seed in absorbed:
+                continue
+            bucket = merged_buckets[seed]
+
+            while len(bucket.users) < self.min_bucket_size:
+                partner = self._best_partner(seed, merged_buckets, language_index, absorbed)
+                if partner is None:
+                    break
+
+                partner_bucket = merged_buckets[partner]
+                for language in partner_bucket.languages:
+                    language_index[(partner_bucket.city, language)].discard(partner)
+                absorbed.add(partner)
+
+                shared_languages = bucket.languages & partner_bucket.languages
+                for language in bucket.languages - shared_languages:
+                    language_index[(bucket.city, language)].discard(seed)
+
+                bucket.dietary_restrictions = self._stricter_diet(
+                    bucket.dietary_restrictions, partner_bucket.dietary_restrictions
+                )
+                bucket.budget_ranges = tuple(sorted(
+                    set(bucket.budget_ranges) | set(partner_bucket.budget_ranges),
+                    key=self._budget_order
+                ))
+                bucket.languages = shared_languages
+                bucket.users.extend(partner_bucket.users)
+
+        merged = {}
+        for position, bucket in enumerate(merged_buckets):
+            if position not in absorbed and len(bucket.users) >= self.min_bucket_size:
+                merged.setdefault(bucket.constraint_key(), []).extend(bucket.users)
+        return merged
+
+    def _best_partner(self, seed: int, merged_buckets: List[MergedBucket], language_index,
+                      absorbed: set) -> Optional[int]:
+        """Compatible bucket to merge into the seed, preferring small ones that need the fewest relaxations."""
+        bucket = merged_buckets[seed]
+        candidates = set()
+        for language in bucket.languages:
+            candidates.update(language_index.get((bucket.city, language), ()))
+        candidates.discard(seed)
+
+        best_partner, best_rank = None, None
+        for candidate in candidates:
+            if candidate in absorbed:
+                continue
+            candidate_bucket = merged_buckets[candidate]
+            if not self._compatible(bucket, candidate_bucket):
+                continue
+
+            rank = (
+                len(candidate_bucket.users) >= self.min_bucket_size,  # Viable buckets only as a last resort
+                self._relaxation_count(bucket, candidate_bucket),
+                -len(bucket.languages & candidate_bucket.languages),
+                -len(candidate_bucket.users),
+                candidate
+            )
+            if best_rank is None or rank < best_rank:
+                best_partner, best_rank = candidate, rank
+        return best_partner
+
+    def _compatible(self, bucket: MergedBucket, other: MergedBucket) -> bool:
+        if bucket.city != other.city or not bucket.languages & other.languages:
+            return False
+
+        diets = {bucket.dietary_restrictions, other.dietary_restrictions}
+        if len(diets) > 1 and not diets <= set(self.DIETARY_STRICTNESS):
+            return False
+
+        budgets = set(bucket.budget_ranges) | set(other.budget_ranges)
+        if len(budgets) == 1:
+            return True
+        if not budgets <= set(self.BUDGET_BANDS):
+            return False
+        band_positions = [self.BUDGET_BANDS.index(budget) for budget in budgets]
+        return max(band_positions) - min(band_positions) <= 1
+
+    def _relaxation_count(self, bucket: MergedBucket, other: MergedBucket) -> int:
+        """How many of diet, budget and language set differ between two buckets."""
+        return (
+            (bucket.dietary_restrictions != other.dietary_restrictions) +
+            (set(bucket.budget_ranges) != set(other.budget_ranges)) +
+            (bucket.languages != other.languages)
+        )
+
+    def _stricter_diet(self, diet: str, other_diet: str) -> str:
+        if diet == other_diet:
+            return diet
+        return max(diet, other_diet, key=self.DIETARY_STRICTNESS.index)
+
+    def _budget_order(self, budget: str) -> int:
+        return self.BUDGET_BANDS.index(budget) if budget in self.BUDGET_BANDS else len(self.BUDGET_BANDS)
@@ -0,0 +1,54 @@
+from collections import defaultdict
+from typing import Iterable, Set
+
+from models.user_profile import UserProfile
+
+
+class CandidateIndex:
+    """Inverted indexes from city, university and interest to ProfileStore rows.
+
+    University and interest postings are scoped to a city, since candidates in
+    other cities score zero on geography and are only used to top up a pool.
+    """
+
+    def __init__(self):
+        self.city_postings = defaultdict(set)
+        self.university_postings = defaultdict(set)
+        self.interest_postings = defaultdict(set)
+
+    def add(self, row: int, user: UserProfile):
+        """Index a profile under its city, university and interests."""
+        self.city_postings[user.city].add(row)
+        self.university_postings[(user.city, user.university)].add(row)
+        for interest in user.interests:
+            self.interest_postings[(user.city, interest)].add(row)
+
+    def remove(self, row: int, user: UserProfile):
+        """Remove a profile's postings, e.g. before re-indexing an edited profile."""
+        self._discard(self.city_postings, user.city, row)
+        self._discard(self.university_postings, (user.city, user.university), row)
+        for interest in user.interests:
+            self._discard(self.interest_postings, (user.city, interest), row)
+
+    @staticmethod
+    def _discard(postings, key, row: int):
+        rows = postings.get(key)
+        if rows is not None:
+            rows.discard(row)
+            if not rows:
+                del postings[key]
+
+    def same_city(self, city: str) -> Set[int]:
+        """Rows of profiles in the city."""
+        return self.city_postings.get(city, set())
+
+    def same_university(self, city: str, university: str) -> Set[int]:
+        """Rows of profiles at the university in the city."""
+        return self.university_postings.get((city, university), set())
+
+    def shared_interests(self, city: str, interests: Iterable[str]) -> Set[int]:
+        """Rows of profiles in the city sharing at least one interest."""
+        rows = set()
+        for interest in interests:
+            rows.update(self.interest_postings.get((city, interest), ()))
+        return rows
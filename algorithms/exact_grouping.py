@@ -0,0 +1,302 @@
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from models.user_profile import UserProfile
+from algorithms.bucket_encoding import BucketEncoding
+from algorithms.search_budget import SearchBudget
+
+
+class _BudgetExhausted(Exception):
+    """Unwinds the depth-first search when the SearchBudget runs out."""
+
+
+class ExactGroupSolver:
+    """Exact group selection for one small constraint bucket.
+
+    Returns the partition form_dining_groups would select from a full
+    enumeration of the bucket: the highest-scoring group, then the
+    highest-scoring group among the remaining users, and so on. Each pick is a
+    depth-first branch-and-bound over bitmasks of the bucket with running
+    tallies, so no combination lists are built, and partial groups whose
+    component upper bounds cannot beat the best group found so far are pruned.
+
+    With a SearchBudget, a pick cut short keeps the best group found so far and
+    no further picks are made.
+    """
+
+    def __init__(self, users: List[UserProfile], fairness_boosts: Dict[str, float], group_size: int = 6,
+                 encoding: Optional[BucketEncoding] = None, budget: Optional[SearchBudget] = None):
+        self.users = users
+        self.budget = budget
+        self.group_size = group_size
+        self.boosts = [fairness_boosts.get(user.user_id, 0.0) for user in users]
+
+        # Bucket-local encodings of everything calculate_group_score reads
+        interest_ids: Dict[str, int] = {}
+        self.interests = [
+            [interest_ids.setdefault(interest, len(interest_ids)) for interest in user.interests]
+            for user in users
+        ]
+        self.interest_count = len(interest_ids)
+        self.repeats = [max(Counter(interests).values(), default=1) for interests in self.interests]
+        self.shared_with = (encoding or BucketEncoding(users)).shared_interest_rows
+        self.ages = [user.age for user in users]
+        self.gender_bits = [1 << code for code in self._encode([user.gender for user in users])]
+        self.university_bits = [1 << code for code in self._encode([user.university for user in users])]
+        self.status_bits = [1 << code for code in self._encode([user.relationship_status for user in users])]
+        self.alcohol = [int(bool(user.alcohol)) for user in users]
+        self.single = [int(user.relationship_status == "single") for user in users]
+
+        self.evaluated_groups = 0
+        self.pruned_branches = 0
+
+    @staticmethod
+    def _encode(values: List[str]) -> List[int]:
+        codes: Dict[str, int] = {}
+        return [codes.setdefault(value, len(codes)) for value in values]
+
+    def solve(self) -> List[Tuple[List[UserProfile], float]]:
+        """Selected groups with their fairness-adjusted scores, best first."""
+        selected_groups = []
+        free_mask = (1 << len(self.users)) - 1
+
+        while bin(free_mask).count("1") >= self.group_size:
+            best_group = self.best_group(free_mask)
+            if best_group is None:
+                break
+            score, mask = best_group
+            selected_groups.append((
+                [self.users[index] for index in range(len(self.users)) if mask >> index & 1],
+                score
+            ))
+            free_mask &= ~mask
+            if self.budget is not None and self.budget.interrupted:
+                break
+
+        return selected_groups
+
+    def best_group(self, free_mask: int) -> Optional[Tuple[float, int]]:
+        """(fairness-adjusted score, member bitmask) of the best group within free_mask.
+
+        Ties go to the group that comes first in combination order, as with the
+        stable sort over itertools.combinations.
+        """
+        group_size = self.group_size
+        candidates = [index for index in range(len(self.users)) if free_mask >> index & 1]
+        candidate_count = len(candidates)
+        if candidate_count < group_size:
+            return None
+
+        total_pairs = group_size * (group_size - 1) / 2
+        conversation = [
+            self._conversation_score(shared_pairs / total_pairs if total_pairs > 0 else 0)
+            for shared_pairs in range(int(total_pairs) + 1)
+        ]
+        alcohol_scores = [1.0 if 0.3 <= count / group_size <= 0.7 else 0.7 for count in range(group_size + 1)]
+        single_scores = [1.0 if 0.2 <= count / group_size <= 0.8 else 0.8 for count in range(group_size + 1)]
+        max_mentions = group_size * max((len(self.interests[index]) for index in candidates), default=0)
+        # Interests repeated in a profile count once per mention, as in calculate_interest_diversity
+        max_count = group_size * max((self.repeats[index] for index in candidates), default=1)
+        plogp = [
+            [0.0] + [(count / mentions) * math.log2(count / mentions) for count in range(1, max_count + 1)]
+            for mentions in range(1, max_mentions + 1)
+        ]
+
+        # What the candidates from each position onwards can still contribute, for the bounds
+        suffix_alcohol = [0] * (candidate_count + 1)
+        suffix_single = [0] * (candidate_count + 1)
+        suffix_min_age = [math.inf] * (candidate_count + 1)
+        suffix_max_age = [-math.inf] * (candidate_count + 1)
+        suffix_gender_bits = [0] * (candidate_count + 1)
+        suffix_status_bits = [0] * (candidate_count + 1)
+        suffix_top_boosts = [[] for _ in range(candidate_count + 1)]
+        for position in range(candidate_count - 1, -1, -1):
+            index = candidates[position]
+            suffix_alcohol[position] = suffix_alcohol[position + 1] + self.alcohol[index]
+            suffix_single[position] = suffix_single[position + 1] + self.single[index]
+            suffix_min_age[position] = min(suffix_min_age[position + 1], self.ages[index])
+            suffix_max_age[position] = max(suffix_max_age[position + 1], self.ages[index])
+            suffix_gender_bits[position] = suffix_gender_bits[position + 1] | self.gender_bits[index]
+            suffix_status_bits[position] = suffix_status_bits[position + 1] | self.status_bits[index]
+            suffix_top_boosts[position] = sorted(
+                suffix_top_boosts[position + 1] + [self.boosts[index]], reverse=True
+            )[:group_size]
+
+        interest_counts = [0] * self.interest_count
+        count_frequencies = [0] * (max_count + 1)  # How many interests have exactly c mentions
+        gender_counts: Dict[int, int] = {}
+        status_counts: Dict[int, int] = {}
+        best = [-math.inf, 0]
+
+        def upper_bound(position, depth, shared_pairs, age_sum, age_square_sum, university_mask,
+                        alcohol_count, single_count, boost_sum):
+            """Best score any completion of the partial group could reach, component by component."""
+            remaining = group_size - depth
+            pool_size = candidate_count - position
+
+            # Conversation peaks at a 70% shared ratio; the open pairs may or may not share
+            known_pairs = depth * (depth - 1) / 2
+            lowest_ratio = shared_pairs / total_pairs
+            highest_ratio = (shared_pairs + total_pairs - known_pairs) / total_pairs
+            interest_bound = 0.6 + 0.4 * self._conversation_score(min(max(0.7, lowest_ratio), highest_ratio))
+
+            # Population variance is convex in each added age, so its maximum over the
+            # pool's age range is reached with every added age at one of the two ends
+            age_bound = 0.0
+            for low_count in range(remaining + 1):
+                added_sum = low_count * suffix_min_age[position] + (remaining - low_count) * suffix_max_age[position]
+                added_square_sum = (
+                    low_count * suffix_min_age[position] ** 2 +
+                    (remaining - low_count) * suffix_max_age[position] ** 2
+                )
+                mean_age = (age_sum + added_sum) / group_size
+                age_variance = (age_square_sum + added_square_sum) / group_size - mean_age * mean_age
+                age_bound = max(age_bound, min(math.sqrt(max(age_variance, 0.0)) / 3.0, 1.0))
+
+            # The rarest gender can have at most its current count plus every remaining seat
+            possible_genders = len(gender_counts) + bin(suffix_gender_bits[position] & ~gender_mask[0]).count("1")
+            if possible_genders > 1:
+                rarest_count = min(min(gender_counts.values()) + remaining if gender_counts else remaining, group_size / 2)
+                gender_bound = 1.0 - abs(0.5 - rarest_count / group_size) * 2
+            else:
+                gender_bound = 0.0
+
+            university_bound = min((bin(university_mask).count("1") + remaining) / 3.0, 1.0)
+
+            # The group may end up with any number of statuses between those present and those
+            # possible, and fewer statuses can score higher (a 3/3 split of two scores 1.0)
+            possible_statuses = len(status_counts) + bin(suffix_status_bits[position] & ~status_mask[0]).count("1")
+            current_largest = max(status_counts.values(), default=0)
+            status_bound = 0.5
+            for status_total in range(max(len(status_counts), 2), possible_statuses + 1):
+                largest_count = max(current_largest, math.ceil(group_size / status_total))
+                status_bound = max(status_bound, 1.0 - (largest_count / group_size - 1 / status_total))
+
+            balance_bound = age_bound * 0.3 + gender_bound * 0.3 + university_bound * 0.2 + status_bound * 0.2
+
+            pool_alcohol = suffix_alcohol[position]
+            pool_single = suffix_single[position]
+            alcohol_bound = max(alcohol_scores[alcohol_count + added] for added in range(
+                max(0, remaining - (pool_size - pool_alcohol)), min(remaining, pool_alcohol) + 1
+            ))
+            single_bound = max(single_scores[single_count + added] for added in range(
+                max(0, remaining - (pool_size - pool_single)), min(remaining, pool_single) + 1
+            ))
+            social_bound = (alcohol_bound + single_bound) / 2
+
+            return (
+                interest_bound * 0.4 + balance_bound * 0.3 + social_bound * 0.3 +
+                boost_sum + sum(suffix_top_boosts[position][:remaining])
+            )
+
+        budget = self.budget
+
+        def score_group(mask, mentions, distinct, shared_pairs, age_sum, age_square_sum,
+                        university_mask, alcohol_count, single_count, boost_sum):
+            if budget is not None and not budget.spend():
+                raise _BudgetExhausted
+            self.evaluated_groups += 1
+            if mentions:
+                entropy = 0.0
+                mention_plogp = plogp[mentions - 1]
+                for count in range(1, max_count + 1):
+                    if count_frequencies[count]:
+                        entropy -= count_frequencies[count] * mention_plogp[count]
+                diversity = entropy / math.log2(distinct) if distinct > 1 else entropy
+            else:
+                diversity = 0.0
+
+            mean_age = age_sum / group_size
+            age_variance = max(age_square_sum / group_size - mean_age * mean_age, 0.0)
+            if len(status_counts) > 1:
+                status_balance = 1.0 - (max(status_counts.values()) / group_size - 1 / len(status_counts))
+            else:
+                status_balance = 0.5
+            balance = (
+                min(math.sqrt(age_variance) / 3.0, 1.0) * 0.3 +
+                (1.0 - abs(0.5 - min(gender_counts.values()) / group_size) * 2) * 0.3 +
+                min(bin(university_mask).count("1") / 3.0, 1.0) * 0.2 +
+                status_balance * 0.2
+            )
+            social = (alcohol_scores[alcohol_count] + single_scores[single_count]) / 2
+            interest_score = diversity * 0.6 + conversation[shared_pairs] * 0.4
+
+            score = interest_score * 0.4 + balance * 0.3 + social * 0.3 + boost_sum
+            if score > best[0]:
+                best[0] = score
+                best[1] = mask
+
+        # Bitmasks of the genders and statuses present, kept alongside the counts
+        gender_mask = [0]
+        status_mask = [0]
+
+        def extend(position, depth, mask, mentions, distinct, shared_pairs, age_sum, age_square_sum,
+                   university_mask, alcohol_count, single_count, boost_sum):
+            if depth == group_size:
+                score_group(mask, mentions, distinct, shared_pairs, age_sum, age_square_sum,
+                            university_mask, alcohol_count, single_count, boost_sum)
+                return
+
+            if depth and upper_bound(position, depth, shared_pairs, age_sum, age_square_sum, university_mask,
+                                     alcohol_count, single_count, boost_sum) <= best[0]:
+                self.pruned_branches += 1
+                return
+
+            for next_position in range(position, candidate_count - (group_size - depth - 1)):
+                index = candidates[next_position]
+                interests = self.interests[index]
+                new_distinct = distinct
+                for interest in interests:
+                    count = interest_counts[interest]
+                    if count:
+                        count_frequencies[count] -= 1
+                    else:
+                        new_distinct += 1
+                    interest_counts[interest] = count + 1
+                    count_frequencies[count + 1] += 1
+                gender_bit = self.gender_bits[index]
+                status_bit = self.status_bits[index]
+                gender_counts[gender_bit] = gender_counts.get(gender_bit, 0) + 1
+                status_counts[status_bit] = status_counts.get(status_bit, 0) + 1
+                previous_masks = (gender_mask[0], status_mask[0])
+                gender_mask[0] |= gender_bit
+                status_mask[0] |= status_bit
+                age = self.ages[index]
+
+                extend(
+                    next_position + 1, depth + 1, mask | (1 << index), mentions + len(interests), new_distinct,
+                    shared_pairs + bin(self.shared_with[index] & mask).count("1"),
+                    age_sum + age, age_square_sum + age * age,
+                    university_mask | self.university_bits[index],
+                    alcohol_count + self.alcohol[index], single_count + self.single[index],
+                    boost_sum + self.boosts[index]
+                )
+
+                gender_mask[0], status_mask[0] = previous_masks
+                for counts, bit in ((gender_counts, gender_bit), (status_counts, status_bit)):
+                    counts[bit] -= 1
+                    if not counts[bit]:
+                        del counts[bit]
+                for interest in reversed(interests):
+                    count = interest_counts[interest]
+                    count_frequencies[count] -= 1
+                    if count > 1:
+                        count_frequencies[count - 1] += 1
+                    interest_counts[interest] = count - 1
+
+        try:
+            extend(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0.0)
+        except _BudgetExhausted:
+            if not best[1]:
+                return None
+        return best[0], best[1]
+
+    @staticmethod
+    def _conversation_score(shared_ratio: float) -> float:
+        """calculate_conversation_potential as a function of the shared-pair ratio."""
+        optimal_shared_ratio = 0.7
+        if shared_ratio <= optimal_shared_ratio:
+            return shared_ratio / optimal_shared_ratio
+        excess_similarity = (shared_ratio - optimal_shared_ratio) / (1.0 - optimal_shared_ratio)
+        return 1.0 - (excess_similarity * 0.3)
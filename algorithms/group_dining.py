@@ -1,23 +1,40 @@
 import random
 import math
-import itertools
+import time
 from collections import Counter, defaultdict
-from typing import List, Dict, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
 import numpy as np
 
 from models.user_profile import UserProfile
+from models.profile_store import ProfileStore
+from models.group_history import GroupHistory
+from algorithms.group_state import GroupScoreState
+from algorithms.exact_grouping import ExactGroupSolver
+from algorithms.bucket_merging import BucketMerger
+from algorithms.bucket_encoding import BucketEncoding
+from algorithms.search_budget import SearchBudget
+from utils.instrumentation import stage, timed
 
 
 class GroupDiningMatcher:
     """Algorithm for forming compatible dining groups based on user constraints and preferences."""
     
-    def __init__(self):
-        self.user_profiles = {}
-        self.group_history = defaultdict(list)
+    GROUPING_STRATEGIES = ('sampling', 'local_search')
+    BUCKETING_MODES = ('exact', 'relaxed')
+    EXACT_SEARCH_MAX_USERS = 20  # Buckets up to this size are solved exactly under either strategy
+    
+    def __init__(self, history_path: Optional[str] = None):
+        self.user_profiles = ProfileStore()
+        # Per-user group counts and recent co-diners, persisted to SQLite when history_path is set
+        self.group_history = GroupHistory(history_path)
+        self.last_formation_report: Dict = {}
+        # Cost of the last group history write, reserved out of later deadlines
+        self._history_ms_per_user = 0.0
         
     def add_user(self, user: UserProfile):
         """Add a user to the system."""
-        self.user_profiles[user.user_id] = user
+        self.user_profiles.add(user)
     
     def get_constraint_key(self, user: UserProfile) -> Tuple:
         """Generate constraint key for grouping compatible users."""
@@ -28,14 +45,26 @@ class GroupDiningMatcher:
             tuple(sorted(user.languages))
         )
     
-    def filter_compatible_users(self, available_users: List[UserProfile]) -> Dict[Tuple, List[UserProfile]]:
-        """Group users by hard constraints (diet, budget, location, language)."""
+    @timed('group_dining.constraint_filter')
+    def filter_compatible_users(self, available_users: List[UserProfile],
+                                bucketing: str = 'exact') -> Dict[Tuple, List[UserProfile]]:
+        """Group users by hard constraints (diet, budget, location, language).
+        
+        bucketing 'relaxed' merges buckets too small to seat a group into compatible ones
+        that share a language, an adjacent budget band and a diet the table can serve.
+        """
+        if bucketing not in self.BUCKETING_MODES:
+            raise ValueError(f"Unknown bucketing mode: {bucketing!r}")
+        
         compatible_groups = defaultdict(list)
         
         for user in available_users:
             constraint_key = self.get_constraint_key(user)
             compatible_groups[constraint_key].append(user)
         
+        if bucketing == 'relaxed':
+            return BucketMerger(min_bucket_size=6).merge(compatible_groups)
+        
         # Filter groups with minimum viable size
         return {k: v for k, v in compatible_groups.items() if len(v) >= 6}
     
@@ -65,20 +94,22 @@ class GroupDiningMatcher:
         
         return normalized_entropy
     
-    def calculate_conversation_potential(self, group: List[UserProfile]) -> float:
-        """Calculate conversation potential based on shared interests and diversity."""
-        # Count pairs with shared interests
-        shared_interest_pairs = 0
+    def calculate_conversation_potential(self, group: List[UserProfile],
+                                         shared_interest_pairs: Optional[int] = None) -> float:
+        """Calculate conversation potential based on shared interests and diversity.
+        
+        shared_interest_pairs can be passed in when already known, e.g. from a BucketEncoding.
+        """
         total_possible_pairs = len(group) * (len(group) - 1) / 2
         
-        for i in range(len(group)):
-            for j in range(i + 1, len(group)):
-                user1_interests = set(group[i].interests)
-                user2_interests = set(group[j].interests)
-                
-                shared_interests = len(user1_interests.intersection(user2_interests))
-                if shared_interests >= 1:  # At least one shared interest
-                    shared_interest_pairs += 1
+        if shared_interest_pairs is None:
+            # Count pairs with shared interests
+            shared_interest_pairs = 0
+            interest_masks = [member.interest_mask for member in group]
+            for i in range(len(group)):
+                for j in range(i + 1, len(group)):
+                    if interest_masks[i] & interest_masks[j]:  # At least one shared interest
+                        shared_interest_pairs += 1
         
         # Aim for 60-80% of pairs having shared interests
         optimal_shared_ratio = 0.7
@@ -154,7 +185,8 @@ class GroupDiningMatcher:
         
         return (alcohol_compatibility + relationship_compatibility) / 2
     
-    def calculate_group_score(self, group: List[UserProfile]) -> float:
+    def calculate_group_score(self, group: List[UserProfile],
+                              shared_interest_pairs: Optional[int] = None) -> float:
         """Calculate overall group quality score."""
         # Score component weights
         DIVERSITY_WEIGHT = 0.4
@@ -162,7 +194,7 @@ class GroupDiningMatcher:
         SOCIAL_WEIGHT = 0.3
         
         diversity_score = self.calculate_interest_diversity(group)
-        conversation_score = self.calculate_conversation_potential(group)
+        conversation_score = self.calculate_conversation_potential(group, shared_interest_pairs)
         balance_score = self.calculate_demographic_balance(group)
         social_score = self.calculate_social_compatibility(group)
         
@@ -177,15 +209,38 @@ class GroupDiningMatcher:
         
         return total_score
     
+    @timed('group_dining.vectorized_scoring')
+    def calculate_group_scores(self, encoding: BucketEncoding, positions: np.ndarray) -> np.ndarray:
+        """Vectorized calculate_group_score for many groups, given as rows of bucket positions."""
+        # Score component weights
+        DIVERSITY_WEIGHT = 0.4
+        BALANCE_WEIGHT = 0.3
+        SOCIAL_WEIGHT = 0.3
+        
+        positions = np.asarray(positions, dtype=np.int64).reshape(len(positions), -1)
+        if len(positions) == 0:
+            return np.zeros(0)
+        
+        interest_score = encoding.interest_diversity(positions) * 0.6 + encoding.conversation_potential(positions) * 0.4
+        return (
+            interest_score * DIVERSITY_WEIGHT +
+            encoding.demographic_balance(positions) * BALANCE_WEIGHT +
+            encoding.social_compatibility(positions) * SOCIAL_WEIGHT
+        )
+    
+    def create_group_state(self, group: List[UserProfile]) -> GroupScoreState:
+        """Incremental scoring state for a group, supporting add, remove and swap in O(group size)."""
+        return GroupScoreState(group)
+    
     def apply_fairness_boost(self, user: UserProfile, base_score: float) -> float:
         """Apply fairness boost for users who haven't had good experiences."""
-        user_group_history = self.group_history.get(user.user_id, [])
+        group_count = self.group_history.group_count(user.user_id)
         
-        if len(user_group_history) == 0:
+        if group_count == 0:
             return base_score  # New user, no boost needed
         
         # Users who haven't been in many groups get boost
-        if len(user_group_history) < 3:
+        if group_count < 3:
             fairness_boost = 0.15
         else:
             fairness_boost = 0.0
@@ -193,75 +248,430 @@ class GroupDiningMatcher:
         return base_score + fairness_boost
     
     def select_non_overlapping_groups(self, scored_groups: List[Tuple[List[UserProfile], float]], 
-                                    target_group_size: int = 6) -> List[List[UserProfile]]:
-        """Select non-overlapping groups with highest scores."""
+                                    target_group_size: int = 6, with_stats: bool = False,
+                                    available_users: Optional[List[UserProfile]] = None):
+        """Select non-overlapping groups with highest scores.
+        
+        Users are mapped to dense bit positions and each group to a bitmask, so the overlap
+        check is a single AND. Passing the available_users the groups were drawn from lets
+        the scan stop once too few of them remain to seat another group. With
+        with_stats=True, returns (groups, stats).
+        """
+        selected, stats = self._select_scored_groups(scored_groups, target_group_size, available_users)
+        selected_groups = [group for group, score in selected]
+        return (selected_groups, stats) if with_stats else selected_groups
+    
+    @timed('group_dining.selection')
+    def _select_scored_groups(self, scored_groups: List[Tuple[List[UserProfile], float]],
+                              target_group_size: int,
+                              available_users: Optional[List[UserProfile]]) -> Tuple[List[Tuple[List[UserProfile], float]], Dict]:
+        """Greedy bitmask selection behind select_non_overlapping_groups, keeping the scores."""
         # Sort groups by score (highest first)
         scored_groups.sort(key=lambda x: x[1], reverse=True)
         
-        selected_groups = []
-        used_user_ids = set()
+        user_bits: Dict[str, int] = {}
+        if available_users is not None:
+            for user in available_users:
+                user_bits.setdefault(user.user_id, 1 << len(user_bits))
+        remaining_user_count = len(user_bits) if available_users is not None else None
+        
+        selected = []
+        used_mask = 0
+        examined_count = 0
+        overlap_rejections = 0
         
         for group, score in scored_groups:
+            if remaining_user_count is not None and remaining_user_count < target_group_size:
+                break
+            examined_count += 1
+            
+            group_mask = 0
+            for user in group:
+                user_bit = user_bits.get(user.user_id)
+                if user_bit is None:
+                    user_bit = user_bits[user.user_id] = 1 << len(user_bits)
+                group_mask |= user_bit
+            
             # Check if any user in this group is already used
-            group_user_ids = {user.user_id for user in group}
+            if group_mask & used_mask:
+                overlap_rejections += 1
+                continue
+            
+            # No overlap, add this group
+            selected.append((group, score))
+            used_mask |= group_mask
+            if remaining_user_count is not None:
+                remaining_user_count -= len(group)
+        
+        stats = {
+            'candidate_groups': len(scored_groups),
+            'examined_groups': examined_count,
+            'selected_groups': len(selected),
+            'overlap_rejections': overlap_rejections,
+            'users_placed': bin(used_mask).count("1")
+        }
+        return selected, stats
+    
+    @timed('group_dining.fairness_boosts')
+    def calculate_fairness_boosts(self, users: List[UserProfile]) -> Dict[str, float]:
+        """Per-user fairness adjustment added to the score of any group they join."""
+        return {
+            user.user_id: self.apply_fairness_boost(user, 0) * 0.1  # Small individual boost
+            for user in users
+        }
+    
+    @timed('group_dining.bucket_encoding')
+    def encode_bucket(self, users: List[UserProfile]) -> BucketEncoding:
+        """Pairwise shared-interest matrix for a constraint bucket, computed once for all its groups."""
+        return BucketEncoding(users)
+    
+    @timed('group_dining.exact_search')
+    def solve_bucket_exactly(self, users: List[UserProfile], target_group_size: int,
+                             fairness_boosts: Dict[str, float],
+                             budget: Optional[SearchBudget] = None) -> List[Tuple[List[UserProfile], float]]:
+        """Groups a full enumeration of a small bucket would select, found by branch-and-bound."""
+        return ExactGroupSolver(users, fairness_boosts, target_group_size, self.encode_bucket(users), budget).solve()
+    
+    @timed('group_dining.sampling')
+    def sample_bucket_groups(self, users: List[UserProfile], target_group_size: int,
+                             fairness_boosts: Dict[str, float],
+                             rng: Optional[random.Random] = None,
+                             budget: Optional[SearchBudget] = None) -> List[Tuple[List[UserProfile], float]]:
+        """Score sampled candidate groups within one constraint bucket."""
+        rng = rng or random
+        
+        encoding = self.encode_bucket(users)
+        
+        # Sample combinations (as bucket positions) rather than generating all to avoid combinatorial explosion
+        possible_groups = []
+        sample_count = min(1000, len(users) * 10)  # Reasonable sample size
+        if budget is not None:
+            remaining_evaluations = budget.remaining_evaluations()
+            if remaining_evaluations is not None and remaining_evaluations < sample_count:
+                sample_count = remaining_evaluations
+                budget.interrupted = True
+            if not budget.spend(sample_count):
+                return []
+        for _ in range(sample_count):
+            if len(users) >= target_group_size:
+                possible_groups.append(rng.sample(range(len(users)), target_group_size))
+        
+        # Score every sampled group in one vectorized pass over the bucket encoding
+        positions = np.array(possible_groups, dtype=np.int64).reshape(len(possible_groups), target_group_size)
+        base_scores = self.calculate_group_scores(encoding, positions)
+        
+        # Apply fairness adjustments
+        user_boosts = np.array([fairness_boosts[user.user_id] for user in users])
+        fairness_adjusted_scores = base_scores + user_boosts[positions].sum(axis=1)
+        
+        return [
+            ([users[position] for position in group_positions], float(score))
+            for group_positions, score in zip(possible_groups, fairness_adjusted_scores)
+        ]
+    
+    @timed('group_dining.local_search')
+    def optimize_bucket_groups(self, users: List[UserProfile], target_group_size: int,
+                               fairness_boosts: Dict[str, float], time_budget_ms: float,
+                               rng: Optional[random.Random] = None,
+                               budget: Optional[SearchBudget] = None) -> List[Tuple[List[UserProfile], float]]:
+        """Partition one constraint bucket into groups and improve it by member swaps.
+        
+        Starts from a random partition (leftover users wait on a bench) and hill-climbs on the
+        total fairness-adjusted score by swapping members between two groups or between a group
+        and the bench, until the time budget runs out or no swap has helped for a while.
+        Each swap charges the groups it rescores to the optional SearchBudget.
+        """
+        rng = rng or random
+        shuffled_users = list(users)
+        rng.shuffle(shuffled_users)
+        group_count = len(shuffled_users) // target_group_size
+        if group_count == 0 or (budget is not None and not budget.spend(group_count)):
+            return []
+        
+        states = [
+            GroupScoreState(shuffled_users[index * target_group_size:(index + 1) * target_group_size])
+            for index in range(group_count)
+        ]
+        scores = [state.score() for state in states]
+        bench = shuffled_users[group_count * target_group_size:]
+        
+        deadline = time.perf_counter() + time_budget_ms / 1000
+        max_idle_moves = 20 * len(users)
+        idle_moves = 0
+        
+        # A single group with nobody on the bench has no swap to try
+        searchable = group_count > 1 or bool(bench)
+        
+        while searchable and idle_moves < max_idle_moves and time.perf_counter() < deadline:
+            idle_moves += 1
+            first = rng.randrange(group_count)
+            first_member = rng.choice(states[first].members)
+            
+            # Pick a swap partner from another group or from the bench
+            partner = rng.randrange(group_count - 1 + (1 if bench else 0))
+            if partner >= first:
+                partner += 1
+            
+            if budget is not None and not budget.spend(1 if partner == group_count else 2):
+                break
             
-            if not group_user_ids.intersection(used_user_ids):
-                # No overlap, add this group
-                selected_groups.append(group)
-                used_user_ids.update(group_user_ids)
+            if partner == group_count:
+                # Group <-> bench swap: only the group score and the placed fairness boosts change
+                bench_index = rng.randrange(len(bench))
+                bench_member = bench[bench_index]
+                new_score = states[first].swap_member(first_member, bench_member)
+                delta = (
+                    new_score - scores[first] +
+                    fairness_boosts[bench_member.user_id] - fairness_boosts[first_member.user_id]
+                )
+                if delta > 1e-12:
+                    scores[first] = new_score
+                    bench[bench_index] = first_member
+                    idle_moves = 0
+                else:
+                    states[first].replace_member(bench_member, first_member)
+                continue
+            
+            # Group <-> group swap
+            second_member = rng.choice(states[partner].members)
+            new_first_score = states[first].swap_member(first_member, second_member)
+            new_second_score = states[partner].swap_member(second_member, first_member)
+            delta = new_first_score + new_second_score - scores[first] - scores[partner]
+            if delta > 1e-12:
+                scores[first] = new_first_score
+                scores[partner] = new_second_score
+                idle_moves = 0
+            else:
+                states[first].replace_member(second_member, first_member)
+                states[partner].replace_member(first_member, second_member)
         
-        return selected_groups
+        return [
+            (list(state.members), score + sum(fairness_boosts[member.user_id] for member in state.members))
+            for state, score in zip(states, scores)
+        ]
+    
+    @timed('group_dining.baseline')
+    def baseline_bucket_groups(self, bucket_user_lists: List[List[UserProfile]], target_group_size: int,
+                               fairness_boosts: Dict[str, float]) -> List[List[Tuple[List[UserProfile], float]]]:
+        """Cheap valid partition of each bucket into consecutive groups, the fallback when a search is cut short.
+        
+        Group scoring only compares members within a group, so the groups of every bucket
+        share one encoding and are scored in a single vectorized pass.
+        """
+        seated_lists = [users[:len(users) // target_group_size * target_group_size] for users in bucket_user_lists]
+        seated_users = [user for users in seated_lists for user in users]
+        if not seated_users:
+            return [[] for _ in bucket_user_lists]
+        
+        positions = np.arange(len(seated_users)).reshape(-1, target_group_size)
+        base_scores = self.calculate_group_scores(BucketEncoding(seated_users), positions)
+        user_boosts = np.array([fairness_boosts[user.user_id] for user in seated_users])
+        fairness_adjusted_scores = (base_scores + user_boosts[positions].sum(axis=1)).tolist()
+        
+        baseline_groups = []
+        first_group = 0
+        for users in seated_lists:
+            group_count = len(users) // target_group_size
+            baseline_groups.append([
+                (users[index * target_group_size:(index + 1) * target_group_size], fairness_adjusted_scores[first_group + index])
+                for index in range(group_count)
+            ])
+            first_group += group_count
+        return baseline_groups
+    
+    def form_bucket_groups(self, users: List[UserProfile], target_group_size: int,
+                           fairness_boosts: Dict[str, float], strategy: str = 'sampling',
+                           time_budget_ms: float = 100.0, rng: Optional[random.Random] = None,
+                           budget: Optional[SearchBudget] = None) -> List[Tuple[List[UserProfile], float]]:
+        """Scored candidate groups for one constraint bucket under the given strategy."""
+        if len(users) <= self.EXACT_SEARCH_MAX_USERS:
+            return self.solve_bucket_exactly(users, target_group_size, fairness_boosts, budget)
+        if strategy == 'local_search':
+            return self.optimize_bucket_groups(users, target_group_size, fairness_boosts, time_budget_ms, rng, budget)
+        return self.sample_bucket_groups(users, target_group_size, fairness_boosts, rng, budget)
     
     def form_dining_groups(self, available_users: List[UserProfile], 
-                          target_group_size: int = 6) -> List[List[UserProfile]]:
-        """Main function to form dining groups."""
+                          target_group_size: int = 6, strategy: str = 'sampling',
+                          time_budget_ms: float = 100.0, workers: int = 1,
+                          bucketing: str = 'exact', deadline_ms: Optional[float] = None,
+                          max_evaluations: Optional[int] = None) -> List[List[UserProfile]]:
+        """Main function to form dining groups.
+        
+        Buckets of up to EXACT_SEARCH_MAX_USERS users are solved exactly. For larger buckets,
+        strategy 'sampling' scores sampled combinations and keeps the best non-overlapping
+        ones, and 'local_search' partitions the bucket and improves it by member swaps,
+        sharing time_budget_ms across those buckets by size.
+        
+        With workers > 1, buckets are formed in a process pool, largest first. Each bucket
+        draws from its own seeded generator and results are merged in bucket order, so the
+        groups match a serial run (local search excepted, as it stops on wall-clock time).
+        
+        bucketing 'relaxed' lets small constraint buckets merge (see filter_compatible_users).
+        
+        deadline_ms and max_evaluations (group scorings) make formation anytime: once either
+        runs out, the search in progress keeps its best groups so far and later buckets are
+        skipped. Interrupted and skipped buckets fall back to a baseline partition, and
+        last_formation_report records how much of the search finished. In a process pool
+        each bucket gets the remaining time and a size-proportional share of the evaluations.
+        The deadline covers the whole call: baseline scoring runs inside it, and the closing
+        group history write is held back from it at the cost per user of the previous write.
+        """
+        if strategy not in self.GROUPING_STRATEGIES:
+            raise ValueError(f"Unknown grouping strategy: {strategy!r}")
+        
+        budget = SearchBudget(deadline_ms, max_evaluations)
+        # Hold the expected group history write back from the deadline
+        budget.reserve_ms(self._history_ms_per_user * len(available_users))
         
         # Step 1: Filter by hard constraints
-        compatible_groups = self.filter_compatible_users(available_users)
-        
-        all_possible_groups = []
+        compatible_groups = self.filter_compatible_users(available_users, bucketing)
+        bucket_user_lists = [
+            users for users in compatible_groups.values()
+            if len(users) >= target_group_size
+        ]
+        fairness_boosts = self.calculate_fairness_boosts(
+            [user for users in bucket_user_lists for user in users]
+        )
+        search_bucket_users = sum(
+            len(users) for users in bucket_user_lists
+            if len(users) > self.EXACT_SEARCH_MAX_USERS
+        )
+        bucket_budgets_ms = [
+            time_budget_ms * len(users) / search_bucket_users if search_bucket_users else 0.0
+            for users in bucket_user_lists
+        ]
+        bucket_seeds = [random.getrandbits(64) for _ in bucket_user_lists]
+        
+        # Under a budget, have a valid partition of every bucket before searching
+        budgeted = deadline_ms is not None or max_evaluations is not None
+        baseline_groups = (
+            self.baseline_bucket_groups(bucket_user_lists, target_group_size, fairness_boosts) if budgeted
+            else [[] for _ in bucket_user_lists]
+        )
         
         # Step 2: Generate and score groups within each constraint group
-        for constraint_key, users in compatible_groups.items():
-            if len(users) < target_group_size:
-                continue
-            
-            # For large groups, use sampling to avoid combinatorial explosion
-            if len(users) > 20:
-                # Sample combinations rather than generating all
-                sample_combinations = []
-                sample_count = min(1000, len(users) * 10)  # Reasonable sample size
-                for _ in range(sample_count):
-                    if len(users) >= target_group_size:
-                        sampled_group = random.sample(users, target_group_size)
-                        sample_combinations.append(sampled_group)
-                possible_groups = sample_combinations
-            else:
-                # Generate all combinations for smaller groups
-                possible_groups = list(itertools.combinations(users, target_group_size))
-            
-            # Score each possible group
-            for group in possible_groups:
-                group_list = list(group)
-                base_score = self.calculate_group_score(group_list)
-                
-                # Apply fairness adjustments
-                fairness_adjusted_score = base_score
-                for user in group_list:
-                    individual_boost = self.apply_fairness_boost(user, 0) * 0.1  # Small individual boost
-                    fairness_adjusted_score += individual_boost
-                
-                all_possible_groups.append((group_list, fairness_adjusted_score))
-        
-        # Step 3: Select non-overlapping groups with highest scores
-        final_groups = self.select_non_overlapping_groups(all_possible_groups, target_group_size)
+        if workers > 1 and len(bucket_user_lists) > 1:
+            bucket_results, bucket_outcomes = self._form_buckets_in_pool(
+                bucket_user_lists, target_group_size, fairness_boosts, strategy,
+                bucket_budgets_ms, bucket_seeds, workers, budget
+            )
+        else:
+            bucket_results, bucket_outcomes = [], []
+            for users, budget_ms, seed in zip(bucket_user_lists, bucket_budgets_ms, bucket_seeds):
+                if budget.interrupted or budget.exhausted:
+                    bucket_results.append([])
+                    bucket_outcomes.append('skipped')
+                    continue
+                bucket_results.append(self.form_bucket_groups(
+                    users, target_group_size, fairness_boosts, strategy, budget_ms, random.Random(seed), budget
+                ))
+                bucket_outcomes.append('interrupted' if budget.interrupted else 'completed')
+        
+        # Buckets whose search did not finish also consider their baseline partition
+        for index, outcome in enumerate(bucket_outcomes):
+            if outcome != 'completed':
+                bucket_results[index] = bucket_results[index] + baseline_groups[index]
+        
+        # Step 3: Select non-overlapping groups with highest scores. Buckets share no users,
+        # so selecting within each bucket and merging by score matches a global selection.
+        selected_groups = []
+        for users, scored_groups in zip(bucket_user_lists, bucket_results):
+            bucket_selection, _ = self._select_scored_groups(scored_groups, target_group_size, users)
+            selected_groups.extend(bucket_selection)
+        final_groups = [group for group, score in sorted(selected_groups, key=lambda x: x[1], reverse=True)]
         
         # Step 4: Update group history
-        for group in final_groups:
-            for user in group:
-                self.group_history[user.user_id].append({
-                    'group_members': [u.user_id for u in group],
-                    'timestamp': 'now'  # In practice, use actual timestamp
-                })
+        with stage('group_dining.history'):
+            history_started_at = time.perf_counter()
+            self.group_history.record_groups([[user.user_id for user in group] for group in final_groups])
+            placed_user_count = sum(len(group) for group in final_groups)
+            if placed_user_count:
+                self._history_ms_per_user = (time.perf_counter() - history_started_at) * 1000 / placed_user_count
+        
+        total_bucket_users = sum(len(users) for users in bucket_user_lists)
+        completed_bucket_users = sum(
+            len(users) for users, outcome in zip(bucket_user_lists, bucket_outcomes)
+            if outcome == 'completed'
+        )
+        self.last_formation_report = {
+            'buckets': len(bucket_user_lists),
+            'buckets_completed': bucket_outcomes.count('completed'),
+            'buckets_interrupted': bucket_outcomes.count('interrupted'),
+            'buckets_skipped': bucket_outcomes.count('skipped'),
+            'completed_fraction': completed_bucket_users / total_bucket_users if total_bucket_users else 1.0,
+            'evaluations': budget.evaluations,
+            'budget_exhausted': any(outcome != 'completed' for outcome in bucket_outcomes),
+            'elapsed_ms': budget.elapsed_ms(),
+            'groups_formed': len(final_groups),
+            'users_placed': sum(len(group) for group in final_groups)
+        }
         
         return final_groups
+    
+    def _form_buckets_in_pool(self, bucket_user_lists: List[List[UserProfile]], target_group_size: int,
+                              fairness_boosts: Dict[str, float], strategy: str,
+                              bucket_budgets_ms: List[float], bucket_seeds: List[int],
+                              workers: int, budget: SearchBudget) -> Tuple[List[List[Tuple[List[UserProfile], float]]], List[str]]:
+        """Run form_bucket_groups for every bucket in a process pool.
+        
+        Returns the scored groups and the outcome of each bucket, in bucket order.
+        """
+        # Largest buckets first, so the long jobs do not start last
+        schedule = sorted(range(len(bucket_user_lists)), key=lambda index: -len(bucket_user_lists[index]))
+        total_bucket_users = sum(len(users) for users in bucket_user_lists)
+        
+        # Queued buckets must not restart the deadline when a worker picks them up, so workers
+        # get it as an absolute wall-clock time
+        remaining_ms = budget.remaining_ms()
+        deadline_at = time.time() + remaining_ms / 1000 if remaining_ms is not None else None
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for index in schedule:
+                users = bucket_user_lists[index]
+                evaluation_share = None
+                if budget.max_evaluations is not None:
+                    evaluation_share = -(-budget.max_evaluations * len(users) // total_bucket_users)
+                # Store-backed views would drag the whole store along, so ship standalone profiles
+                profiles = [user.to_profile() if hasattr(user, 'to_profile') else user for user in users]
+                futures[index] = executor.submit(
+                    _form_bucket_positions, profiles, target_group_size,
+                    {user.user_id: fairness_boosts[user.user_id] for user in users},
+                    strategy, bucket_budgets_ms[index], bucket_seeds[index],
+                    deadline_at, evaluation_share
+                )
+            
+            # Workers return member positions, mapped back onto the caller's objects
+            bucket_results, bucket_outcomes = [], []
+            for index in range(len(bucket_user_lists)):
+                scored_positions, evaluations, outcome = futures[index].result()
+                budget.evaluations += evaluations
+                bucket_results.append([
+                    ([bucket_user_lists[index][position] for position in positions], score)
+                    for positions, score in scored_positions
+                ])
+                bucket_outcomes.append(outcome)
+            return bucket_results, bucket_outcomes
+
+
+def _form_bucket_positions(users: List[UserProfile], target_group_size: int,
+                           fairness_boosts: Dict[str, float], strategy: str,
+                           time_budget_ms: float, seed: int, deadline_at: Optional[float],
+                           max_evaluations: Optional[int]) -> Tuple[List[Tuple[List[int], float]], int, str]:
+    """Process pool entry point: one bucket's scored groups as member positions within the bucket.
+    
+    deadline_at is an absolute time.time() deadline shared by all buckets of the run. Also
+    returns the evaluations spent and whether the bucket 'completed', was 'interrupted' by
+    the budget or 'skipped' because the budget had run out before it started.
+    """
+    deadline_ms = max((deadline_at - time.time()) * 1000, 0.0) if deadline_at is not None else None
+    budget = SearchBudget(deadline_ms, max_evaluations)
+    if budget.exhausted:
+        return [], 0, 'skipped'
+    
+    positions = {id(user): position for position, user in enumerate(users)}
+    scored_groups = GroupDiningMatcher().form_bucket_groups(
+        users, target_group_size, fairness_boosts, strategy, time_budget_ms, random.Random(seed), budget
+    )
+    outcome = 'interrupted' if budget.interrupted else 'completed'
+    return [([positions[id(user)] for user in group], score) for group, score in scored_groups], budget.evaluations, outcome
@@ -0,0 +1,181 @@
+import math
+from collections import Counter
+from typing import Iterable, List
+
+from models.user_profile import UserProfile
+
+
+def _decrement(counts: Counter, key):
+    """Decrement a Counter entry, dropping it at zero so len() counts distinct values."""
+    counts[key] -= 1
+    if counts[key] <= 0:
+        del counts[key]
+
+
+class GroupScoreState:
+    """Running tallies for one dining group, so membership changes rescore in O(group size).
+
+    score() mirrors GroupDiningMatcher.calculate_group_score, computed from the
+    tallies instead of from the member list.
+    """
+
+    def __init__(self, members: Iterable[UserProfile] = ()):
+        self.members: List[UserProfile] = []
+
+        self.interest_counts = Counter()
+        self.interest_mentions = 0
+        self.shared_interest_pairs = 0
+
+        self.age_sum = 0
+        self.age_square_sum = 0
+        self.gender_counts = Counter()
+        self.university_counts = Counter()
+        self.status_counts = Counter()
+
+        self.alcohol_count = 0
+        self.single_count = 0
+
+        for member in members:
+            self._add(member)
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def add_member(self, user: UserProfile) -> float:
+        """Add a member and return the new group score."""
+        self._add(user)
+        return self.score()
+
+    def remove_member(self, user: UserProfile) -> float:
+        """Remove a member and return the new group score."""
+        self._remove(user)
+        return self.score()
+
+    def swap_member(self, old_user: UserProfile, new_user: UserProfile) -> float:
+        """Replace one member with another and return the new group score."""
+        self.replace_member(old_user, new_user)
+        return self.score()
+
+    def replace_member(self, old_user: UserProfile, new_user: UserProfile):
+        """Replace one member with another without rescoring, e.g. to undo a rejected swap."""
+        self._remove(old_user)
+        self._add(new_user)
+
+    def _add(self, user: UserProfile):
+        interest_mask = user.interest_mask
+        for member in self.members:
+            if member.interest_mask & interest_mask:
+                self.shared_interest_pairs += 1
+
+        self.members.append(user)
+        self.interest_counts.update(user.interests)
+        self.interest_mentions += len(user.interests)
+
+        self.age_sum += user.age
+        self.age_square_sum += user.age * user.age
+        self.gender_counts[user.gender] += 1
+        self.university_counts[user.university] += 1
+        self.status_counts[user.relationship_status] += 1
+
+        self.alcohol_count += bool(user.alcohol)
+        self.single_count += user.relationship_status == "single"
+
+    def _remove(self, user: UserProfile):
+        position = next(
+            index for index, member in enumerate(self.members)
+            if member.user_id == user.user_id
+        )
+        removed = self.members.pop(position)
+
+        interest_mask = removed.interest_mask
+        for member in self.members:
+            if member.interest_mask & interest_mask:
+                self.shared_interest_pairs -= 1
+
+        for interest in removed.interests:
+            _decrement(self.interest_counts, interest)
+        self.interest_mentions -= len(removed.interests)
+
+        self.age_sum -= removed.age
+        self.age_square_sum -= removed.age * removed.age
+        _decrement(self.gender_counts, removed.gender)
+        _decrement(self.university_counts, removed.university)
+        _decrement(self.status_counts, removed.relationship_status)
+
+        self.alcohol_count -= bool(removed.alcohol)
+        self.single_count -= removed.relationship_status == "single"
+
+    def interest_diversity(self) -> float:
+        """Normalized entropy of the interest distribution."""
+        if not self.interest_mentions:
+            return 0.0
+
+        entropy = 0.0
+        for count in self.interest_counts.values():
+            probability = count / self.interest_mentions
+            entropy -= probability * math.log2(probability)
+
+        max_possible_entropy = math.log2(len(self.interest_counts)) if len(self.interest_counts) > 1 else 1
+        return entropy / max_possible_entropy
+
+    def conversation_potential(self) -> float:
+        """Closeness of the shared-interest pair ratio to the 70% target."""
+        group_size = len(self.members)
+        total_possible_pairs = group_size * (group_size - 1) / 2
+        optimal_shared_ratio = 0.7
+        actual_shared_ratio = self.shared_interest_pairs / total_possible_pairs if total_possible_pairs > 0 else 0
+
+        if actual_shared_ratio <= optimal_shared_ratio:
+            return actual_shared_ratio / optimal_shared_ratio
+
+        excess_similarity = (actual_shared_ratio - optimal_shared_ratio) / (1.0 - optimal_shared_ratio)
+        return 1.0 - (excess_similarity * 0.3)
+
+    def demographic_balance(self) -> float:
+        """Age spread, gender balance, university mix and relationship status mix."""
+        group_size = len(self.members)
+        if group_size < 2:
+            return 0.0
+
+        balance_score = 0.0
+
+        # Population standard deviation from running sums
+        mean_age = self.age_sum / group_size
+        age_variance = max(self.age_square_sum / group_size - mean_age * mean_age, 0.0)
+        balance_score += min(math.sqrt(age_variance) / 3.0, 1.0) * 0.3
+
+        gender_balance = 1.0 - abs(0.5 - min(self.gender_counts.values()) / group_size) * 2
+        balance_score += gender_balance * 0.3
+
+        balance_score += min(len(self.university_counts) / 3.0, 1.0) * 0.2
+
+        if len(self.status_counts) > 1:
+            status_balance = 1.0 - (max(self.status_counts.values()) / group_size - 1 / len(self.status_counts))
+        else:
+            status_balance = 0.5
+        balance_score += status_balance * 0.2
+
+        return balance_score
+
+    def social_compatibility(self) -> float:
+        """Alcohol and relationship status mix."""
+        group_size = len(self.members)
+        alcohol_ratio = self.alcohol_count / group_size
+        alcohol_compatibility = 1.0 if 0.3 <= alcohol_ratio <= 0.7 else 0.7
+
+        single_ratio = self.single_count / group_size
+        relationship_compatibility = 1.0 if 0.2 <= single_ratio <= 0.8 else 0.8
+
+        return (alcohol_compatibility + relationship_compatibility) / 2
+
+    def score(self) -> float:
+        """Overall group quality score, as GroupDiningMatcher.calculate_group_score."""
+        if not self.members:
+            return 0.0
+
+        interest_score = self.interest_diversity() * 0.6 + self.conversation_potential() * 0.4
+        return (
+            interest_score * 0.4 +
+            self.demographic_balance() * 0.3 +
+            self.social_compatibility() * 0.3
+        )
@@ -1,21 +1,71 @@
 import random
 import math
-from typing import Optional, Dict
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+from typing import Optional, Dict, List, Sequence, Set
+
+import numpy as np
 
 from models.user_profile import UserProfile
+from models.profile_store import ProfileStore
+from algorithms.batch_scoring import CandidateBatch
+from algorithms.similarity_cache import PairSimilarityCache
+from algorithms.behavioral_model import BehavioralModel
+from algorithms.candidate_index import CandidateIndex
+from algorithms.recommendation_feed import RecommendationFeed
+from utils.instrumentation import stage, timed
+
+
+logger = logging.getLogger(__name__)
 
 
 class ProfileDiscoveryEngine:
     """Algorithm for discovering and recommending compatible user profiles."""
     
-    def __init__(self):
-        self.user_profiles = {}
-        self.similarity_cache = {}
+    # Score weights
+    ACADEMIC_WEIGHT = 0.20
+    INTEREST_WEIGHT = 0.25
+    GEOGRAPHIC_WEIGHT = 0.15
+    BEHAVIORAL_WEIGHT = 0.30
+    DIVERSITY_WEIGHT = 0.10
+    
+    def __init__(self, batch_scoring: bool = True, similarity_cache_size: int = 100_000,
+                 feed_size: int = 10, feed_watermark: int = 3, background_refill: bool = True):
+        self.batch_scoring = batch_scoring
+        self.user_profiles = ProfileStore()
+        self.similarity_cache = PairSimilarityCache(similarity_cache_size)
         self.behavioral_models = {}
+        self.candidate_index = CandidateIndex()
+        
+        # Prefetched recommendation feeds
+        self.feeds = {}
+        self.feed_size = feed_size
+        self.feed_watermark = feed_watermark
+        self.background_refill = background_refill
+        self._refill_executor = None
+        
+        # Serializes state changes with background feed refills
+        self._lock = threading.RLock()
+        # Per-user locks serializing feedback with that user's own refills
+        self._user_locks = {}
         
     def add_user(self, user: UserProfile):
-        """Add a user to the system."""
-        self.user_profiles[user.user_id] = user
+        """Add a user to the system, replacing any existing profile with the same user_id."""
+        with self._lock:
+            self._add_user(user)
+    
+    def _add_user(self, user: UserProfile):
+        if user.user_id in self.user_profiles:
+            # Profile edit - cached similarities, feedback summary and postings for this user are stale
+            self.similarity_cache.invalidate_user(user.user_id)
+            self.behavioral_models.pop(user.user_id, None)
+            row = self.user_profiles.row(user.user_id)
+            self.candidate_index.remove(row, self.user_profiles.view(row))
+        
+        row = self.user_profiles.add(user)
+        self.candidate_index.add(row, user)
         
     def calculate_academic_similarity(self, user1: UserProfile, user2: UserProfile) -> float:
         """Calculate academic similarity score between two users (0-1)."""
@@ -38,23 +88,24 @@ class ProfileDiscoveryEngine:
     
     def calculate_interest_compatibility(self, user1: UserProfile, user2: UserProfile) -> float:
         """Calculate interest compatibility using Jaccard similarity with diversity bonus."""
-        interests1 = set(user1.interests)
-        interests2 = set(user2.interests)
+        interests1 = user1.interest_mask
+        interests2 = user2.interest_mask
         
         if not interests1 or not interests2:
             return 0.0
             
-        intersection_count = len(interests1.intersection(interests2))
-        union_count = len(interests1.union(interests2))
+        # Set operations on interest bitmasks
+        intersection_count = (interests1 & interests2).bit_count()
+        union_count = (interests1 | interests2).bit_count()
         
         # Base Jaccard similarity
         jaccard_score = intersection_count / union_count if union_count > 0 else 0
         
         # Apply diversity bonus - penalize identical interest sets
         diversity_multiplier = 1.0
-        if intersection_count == len(interests1) == len(interests2):
+        if interests1 == interests2:
             diversity_multiplier = 0.7  # Reduce score for identical interests
-        elif intersection_count / min(len(interests1), len(interests2)) > 0.8:
+        elif intersection_count / min(interests1.bit_count(), interests2.bit_count()) > 0.8:
             diversity_multiplier = 0.85  # Slight penalty for too much overlap
             
         return jaccard_score * diversity_multiplier
@@ -100,12 +151,18 @@ class ProfileDiscoveryEngine:
         return 0.5  # Neutral score
     
     def calculate_profile_similarity(self, user1: UserProfile, user2: UserProfile) -> float:
-        """Calculate overall profile similarity."""
+        """Calculate overall profile similarity, cached per user pair."""
+        cached_similarity = self.similarity_cache.get(user1.user_id, user2.user_id)
+        if cached_similarity is not None:
+            return cached_similarity
+        
         academic_score = self.calculate_academic_similarity(user1, user2)
         interest_score = self.calculate_interest_compatibility(user1, user2)
         
         # Weighted combination
-        return academic_score * 0.4 + interest_score * 0.6
+        similarity = academic_score * 0.4 + interest_score * 0.6
+        self.similarity_cache.put(user1.user_id, user2.user_id, similarity)
+        return similarity
     
     def calculate_demographic_similarity(self, user1: UserProfile, user2: UserProfile) -> float:
         """Calculate demographic similarity for cold start scenarios."""
@@ -146,13 +203,6 @@ class ProfileDiscoveryEngine:
     
     def calculate_compatibility_score(self, user: UserProfile, candidate: UserProfile) -> float:
         """Main compatibility scoring function."""
-        # Score weights
-        ACADEMIC_WEIGHT = 0.20
-        INTEREST_WEIGHT = 0.25
-        GEOGRAPHIC_WEIGHT = 0.15
-        BEHAVIORAL_WEIGHT = 0.30
-        DIVERSITY_WEIGHT = 0.10
-        
         academic_score = self.calculate_academic_similarity(user, candidate)
         interest_score = self.calculate_interest_compatibility(user, candidate)
         geographic_score = self.calculate_geographic_score(user, candidate)
@@ -160,15 +210,95 @@ class ProfileDiscoveryEngine:
         diversity_score = self.calculate_diversity_bonus(user, candidate, user.interaction_history)
         
         total_score = (
-            academic_score * ACADEMIC_WEIGHT +
-            interest_score * INTEREST_WEIGHT +
-            geographic_score * GEOGRAPHIC_WEIGHT +
-            behavioral_score * BEHAVIORAL_WEIGHT +
-            diversity_score * DIVERSITY_WEIGHT
+            academic_score * self.ACADEMIC_WEIGHT +
+            interest_score * self.INTEREST_WEIGHT +
+            geographic_score * self.GEOGRAPHIC_WEIGHT +
+            behavioral_score * self.BEHAVIORAL_WEIGHT +
+            diversity_score * self.DIVERSITY_WEIGHT
         )
         
         return total_score
     
+    def calculate_compatibility_scores(self, user: UserProfile, candidates: List[UserProfile]) -> np.ndarray:
+        """Score every candidate against the user in one vectorized pass.
+        
+        Produces the same scores as calling calculate_compatibility_score per candidate.
+        """
+        return self._score_batch(user, CandidateBatch.from_profiles(candidates))
+    
+    def _score_batch(self, user: UserProfile, batch: CandidateBatch) -> np.ndarray:
+        """Compute total compatibility scores for an encoded candidate batch."""
+        with stage('profile_discovery.academic_similarity'):
+            academic_scores = batch.academic_similarity(user)
+        with stage('profile_discovery.interest_compatibility'):
+            interest_scores = batch.interest_compatibility(user)
+        with stage('profile_discovery.geographic_score'):
+            geographic_scores = batch.geographic_score(user)
+        
+        with stage('profile_discovery.behavioral_match'):
+            if not user.liked_profiles:
+                # Cold start - demographic similarity and neutral diversity
+                behavioral_scores = batch.demographic_similarity(user)
+                diversity_scores = np.full(len(batch), 0.5)
+            else:
+                # Score against the user's whole feedback window in one broadcast
+                window = self.get_behavioral_model(user).window(self.user_profiles)
+                like_similarity = batch.profile_similarity_rows(self.user_profiles, window.like_rows)
+                dislike_similarity = batch.profile_similarity_rows(self.user_profiles, window.dislike_rows)
+                
+                behavioral_scores = self._batch_behavioral_match(like_similarity, dislike_similarity)
+                diversity_scores = self._batch_diversity_bonus(like_similarity, window.diversity_mask[:, None])
+        
+        return (
+            academic_scores * self.ACADEMIC_WEIGHT +
+            interest_scores * self.INTEREST_WEIGHT +
+            geographic_scores * self.GEOGRAPHIC_WEIGHT +
+            behavioral_scores * self.BEHAVIORAL_WEIGHT +
+            diversity_scores * self.DIVERSITY_WEIGHT
+        )
+    
+    def _batch_behavioral_match(self, like_similarity: np.ndarray, dislike_similarity: np.ndarray,
+                                like_valid=True, dislike_valid=True) -> np.ndarray:
+        """Vectorized calculate_behavioral_match from (... x window x candidates) similarity arrays.
+        
+        like_valid and dislike_valid mask out padding slots in the window axis.
+        """
+        is_similar = (like_similarity > 0.3) & like_valid
+        behavioral_total = np.where(is_similar, like_similarity, 0.0).sum(axis=-2)
+        similar_interaction_count = is_similar.sum(axis=-2)
+        
+        # Candidates with no similar likes fall back to the dislike check
+        similar_to_dislike = ((dislike_similarity > 0.6) & dislike_valid).any(axis=-2)
+        fallback_scores = np.where(similar_to_dislike, 0.1, 0.5)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            like_scores = behavioral_total / similar_interaction_count
+        
+        return np.where(similar_interaction_count > 0, like_scores, fallback_scores)
+    
+    def _batch_diversity_bonus(self, like_similarity: np.ndarray, diversity_valid: np.ndarray) -> np.ndarray:
+        """Vectorized calculate_diversity_bonus from (... x window x candidates) like similarities.
+        
+        diversity_valid selects the window slots that fall within the recent-likes diversity window.
+        """
+        diversity_total = np.where(diversity_valid, 1 - like_similarity, 0.0).sum(axis=-2)
+        diversity_count = diversity_valid.sum(axis=-2)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            diversity_scores = diversity_total / diversity_count
+        
+        return np.where(diversity_count > 0, diversity_scores, 0.5)
+    
+    def get_behavioral_model(self, user: UserProfile) -> BehavioralModel:
+        """Return the user's feedback summary, rebuilding it if the history changed outside the engine."""
+        with self._lock:
+            model = self.behavioral_models.get(user.user_id)
+            if model is None or not model.is_current(user.liked_profiles, user.disliked_profiles):
+                model = BehavioralModel(user.liked_profiles, user.disliked_profiles)
+                if user.user_id in self.user_profiles:
+                    self.behavioral_models[user.user_id] = model
+            return model
+    
     def get_exploration_rate(self, user: UserProfile) -> float:
         """Dynamic exploration rate based on user experience."""
         total_interactions = len(user.liked_profiles) + len(user.disliked_profiles)
@@ -187,59 +317,428 @@ class ProfileDiscoveryEngine:
             return None
         
         user = self.user_profiles[user_id]
+        candidate_rows, scores = self.score_candidates(user, max_candidates)
+        
+        if not candidate_rows:
+            return None
+        
+        # Apply exploration strategy (epsilon-greedy)
+        with stage('profile_discovery.exploration'):
+            exploration_rate = self.get_exploration_rate(user)
+            
+            if random.random() < exploration_rate:
+                # Exploration: Select from top 20%
+                top_candidate_count = max(1, len(scores) // 5)
+                exploration_pool = self.top_k_indices(scores, top_candidate_count)
+                return self.user_profiles.view(candidate_rows[random.choice(exploration_pool)])
+            else:
+                # Exploitation: Select highest scoring candidate
+                return self.user_profiles.view(candidate_rows[int(np.argmax(scores))])
+    
+    def top_k_profiles(self, user_id: str, k: int, max_candidates: int = 100) -> List[UserProfile]:
+        """Return the k best-scoring unseen profiles for the user, highest first."""
+        if user_id not in self.user_profiles or k <= 0:
+            return []
+        
+        user = self.user_profiles[user_id]
+        candidate_rows, scores = self.score_candidates(user, max(max_candidates, k))
+        
+        return [self.user_profiles.view(candidate_rows[index]) for index in self.top_k_indices(scores, k)]
+    
+    def score_candidates(self, user: UserProfile, max_candidates: int):
+        """Generate unseen candidate rows for the user and their compatibility scores.
+        
+        Holds the engine lock, since background refills score through the same
+        similarity cache, behavioral models and feedback windows.
+        """
+        with self._lock:
+            # Get candidates (excluding self and already seen profiles)
+            with stage('profile_discovery.candidate_scan'):
+                seen_profile_ids = self.get_behavioral_model(user).seen_profile_ids
+                candidate_rows = self.generate_candidates(user, seen_profile_ids, max_candidates)
+            
+            if not candidate_rows:
+                return candidate_rows, np.zeros(0)
+            
+            # Calculate scores for all candidates
+            with stage('profile_discovery.scoring'):
+                if self.batch_scoring:
+                    batch = CandidateBatch.from_store(self.user_profiles, np.array(candidate_rows))
+                    scores = self._score_batch(user, batch)
+                else:
+                    scores = np.array([
+                        self.calculate_compatibility_score(user, self.user_profiles.view(row))
+                        for row in candidate_rows
+                    ])
+            
+            return candidate_rows, scores
+    
+    @staticmethod
+    @timed('profile_discovery.top_k')
+    def top_k_indices(scores: np.ndarray, k: int) -> List[int]:
+        """Indices of the k highest scores, highest first, using partial selection."""
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        
+        if k < len(scores):
+            # k-th largest score, then the earliest candidates among those tied with it
+            threshold = -np.partition(-scores, k - 1)[k - 1]
+            above_threshold = np.flatnonzero(scores > threshold)
+            at_threshold = np.flatnonzero(scores == threshold)[:k - len(above_threshold)]
+            top_indices = np.concatenate((above_threshold, at_threshold))
+        else:
+            top_indices = np.arange(len(scores))
+        
+        # Order the k survivors by score, earliest candidate first on ties
+        order = np.lexsort((top_indices, -scores[top_indices]))
+        return top_indices[order].tolist()
+    
+    def select_next_profiles(self, user_ids: List[str], max_candidates: int = 100,
+                             pool_size: Optional[int] = None, chunk_size: int = 256) -> List[Optional[UserProfile]]:
+        """Select the next profile for many users at once, aligned with user_ids.
+        
+        Requesters in the same city share one encoded candidate pool of up to pool_size
+        (default max_candidates) profiles and are scored together as a (users x candidates)
+        matrix, chunk_size users at a time. Users who have already seen every pooled
+        candidate fall back to select_next_profile.
+        """
+        if pool_size is None:
+            pool_size = max_candidates
+        
+        selected_profiles = [None] * len(user_ids)
+        
+        # Group requesters by city so they can share a candidate pool
+        positions_by_city = defaultdict(list)
+        for position, user_id in enumerate(user_ids):
+            if user_id in self.user_profiles:
+                positions_by_city[self.user_profiles[user_id].city].append(position)
+        
+        for city, positions in positions_by_city.items():
+            pool_rows = self._shared_candidate_pool(city, pool_size)
+            batch = CandidateBatch.from_store(self.user_profiles, np.array(pool_rows, dtype=np.int64))
+            
+            for chunk_start in range(0, len(positions), chunk_size):
+                chunk_positions = positions[chunk_start:chunk_start + chunk_size]
+                chunk_user_ids = [user_ids[position] for position in chunk_positions]
+                
+                with self._lock:
+                    scores = self.calculate_user_scores(chunk_user_ids, batch)
+                    selected_rows = self._select_from_score_matrix(chunk_user_ids, pool_rows, scores)
+                
+                for position, user_id, row in zip(chunk_positions, chunk_user_ids, selected_rows):
+                    if row is None:
+                        selected_profiles[position] = self.select_next_profile(user_id, max_candidates)
+                    else:
+                        selected_profiles[position] = self.user_profiles.view(row)
+        
+        return selected_profiles
+    
+    def calculate_user_scores(self, user_ids: List[str], batch: CandidateBatch) -> np.ndarray:
+        """Compatibility scores of several registered users against a candidate batch (users x candidates).
+        
+        Each row matches calculate_compatibility_scores for that user.
+        """
+        store = self.user_profiles
+        user_rows = np.array([store.row(user_id) for user_id in user_ids], dtype=np.int64)
+        models = [self.get_behavioral_model(store.view(row)) for row in user_rows]
+        
+        academic_scores = batch.academic_similarity_rows(store, user_rows)
+        interest_scores = batch.interest_compatibility_rows(store, user_rows)
+        geographic_scores = batch.geographic_score_rows(store, user_rows)
+        
+        behavioral_scores = np.empty((len(user_rows), len(batch)))
+        diversity_scores = np.full((len(user_rows), len(batch)), 0.5)
+        
+        # Cold start users - demographic similarity and neutral diversity
+        has_likes = np.array([model.has_likes for model in models], dtype=bool)
+        cold_users = np.flatnonzero(~has_likes)
+        behavioral_scores[cold_users] = batch.demographic_similarity_rows(store, user_rows[cold_users])
+        
+        # Users with likes - pad every feedback window to a fixed width and score them together
+        warm_users = np.flatnonzero(has_likes)
+        if len(warm_users):
+            windows = [models[index].window(store) for index in warm_users]
+            like_rows, like_valid = self._pad_window_rows([w.like_rows for w in windows], BehavioralModel.LIKE_WINDOW)
+            dislike_rows, dislike_valid = self._pad_window_rows([w.dislike_rows for w in windows], BehavioralModel.DISLIKE_WINDOW)
+            diversity_valid = np.zeros_like(like_valid)
+            for index, window in enumerate(windows):
+                diversity_valid[index, :len(window.diversity_mask)] = window.diversity_mask
+            
+            like_similarity = batch.profile_similarity_rows(store, like_rows.ravel()).reshape(like_rows.shape + (len(batch),))
+            dislike_similarity = batch.profile_similarity_rows(store, dislike_rows.ravel()).reshape(dislike_rows.shape + (len(batch),))
+            
+            behavioral_scores[warm_users] = self._batch_behavioral_match(
+                like_similarity, dislike_similarity, like_valid[:, :, None], dislike_valid[:, :, None]
+            )
+            diversity_scores[warm_users] = self._batch_diversity_bonus(like_similarity, diversity_valid[:, :, None])
+        
+        return (
+            academic_scores * self.ACADEMIC_WEIGHT +
+            interest_scores * self.INTEREST_WEIGHT +
+            geographic_scores * self.GEOGRAPHIC_WEIGHT +
+            behavioral_scores * self.BEHAVIORAL_WEIGHT +
+            diversity_scores * self.DIVERSITY_WEIGHT
+        )
+    
+    @staticmethod
+    def _pad_window_rows(window_rows: List[np.ndarray], width: int):
+        """Stack variable-length row windows into a (users x width) array plus a validity mask."""
+        padded_rows = np.zeros((len(window_rows), width), dtype=np.int64)
+        valid = np.zeros((len(window_rows), width), dtype=bool)
+        for index, rows in enumerate(window_rows):
+            padded_rows[index, :len(rows)] = rows
+            valid[index, :len(rows)] = True
+        return padded_rows, valid
+    
+    def _shared_candidate_pool(self, city: str, pool_size: int) -> List[int]:
+        """Sample a candidate pool for a city, topped up from other cities when the city is small."""
+        city_rows = self.candidate_index.same_city(city)
+        if len(city_rows) >= pool_size:
+            return random.sample(list(city_rows), pool_size)
+        
+        pool_rows = list(city_rows)
+        other_count = min(pool_size, len(self.user_profiles)) - len(pool_rows)
+        if other_count > 0:
+            pool_rows.extend(self._sample_rows(range(len(self.user_profiles)), set(), set(city_rows), other_count))
+        return pool_rows
+    
+    def _select_from_score_matrix(self, user_ids: List[str], pool_rows: List[int],
+                                  scores: np.ndarray) -> List[Optional[int]]:
+        """Apply seen filtering and the epsilon-greedy choice to each row of a score matrix."""
+        pool_ids = [self.user_profiles.user_ids[row] for row in pool_rows]
+        pool_columns = {profile_id: column for column, profile_id in enumerate(pool_ids)}
+        
+        selected_rows = []
+        for user_scores, user_id in zip(scores, user_ids):
+            user = self.user_profiles[user_id]
+            seen_profile_ids = self.get_behavioral_model(user).seen_profile_ids
+            
+            # Mask the user and everything they have seen, walking whichever side is smaller
+            masked_columns = [pool_columns[user_id]] if user_id in pool_columns else []
+            if len(seen_profile_ids) < len(pool_ids):
+                masked_columns.extend(pool_columns[profile_id] for profile_id in seen_profile_ids if profile_id in pool_columns)
+            else:
+                masked_columns.extend(column for column, profile_id in enumerate(pool_ids) if profile_id in seen_profile_ids)
+            
+            eligible_count = len(pool_ids) - len(set(masked_columns))
+            if eligible_count <= 0:
+                selected_rows.append(None)
+                continue
+            
+            user_scores = user_scores.copy()
+            user_scores[masked_columns] = -np.inf
+            
+            # Apply exploration strategy (epsilon-greedy)
+            if random.random() < self.get_exploration_rate(user):
+                exploration_pool = self.top_k_indices(user_scores, max(1, eligible_count // 5))
+                column = random.choice(exploration_pool)
+            else:
+                column = int(np.argmax(user_scores))
+            selected_rows.append(pool_rows[column])
+        
+        return selected_rows
+    
+    def next_profile(self, user_id: str) -> Optional[UserProfile]:
+        """Pop the next recommendation from the user's prefetched feed.
         
-        # Get candidates (excluding self and already seen profiles)
-        seen_profile_ids = set(user.liked_profiles + user.disliked_profiles + [user_id])
-        candidates = [
-            profile for profile_id, profile in self.user_profiles.items() 
-            if profile_id not in seen_profile_ids
-        ]
+        An empty feed is filled synchronously; once it drops below the watermark or is
+        invalidated by a like it is refilled in the background, so later swipes only pay
+        for a queue pop.
+        """
+        if user_id not in self.user_profiles:
+            return None
+        
+        feed = self.feeds.get(user_id)
+        if feed is None:
+            feed = self.feeds.setdefault(user_id, RecommendationFeed())
         
-        if not candidates:
+        seen_profile_ids = self.get_behavioral_model(self.user_profiles[user_id]).seen_profile_ids
+        profile_id = feed.pop(seen_profile_ids)
+        if profile_id is None:
+            self.refill_feed(user_id)
+            profile_id = feed.pop(seen_profile_ids)
+        
+        if (len(feed) < self.feed_watermark or feed.stale) and not feed.refill_pending:
+            self._schedule_refill(user_id, feed)
+        
+        if profile_id is None:
             return None
+        return self.user_profiles[profile_id]
+    
+    def refill_feed(self, user_id: str, max_candidates: int = 100):
+        """Score a fresh candidate pool and top the user's feed up to feed_size."""
+        feed = self.feeds.get(user_id)
+        if feed is None:
+            return
         
-        # Limit candidates for performance
-        if len(candidates) > max_candidates:
-            candidates = random.sample(candidates, max_candidates)
+        generation = feed.generation
+        with self._lock, self._user_lock(user_id):
+            user = self.user_profiles[user_id]
+            candidate_rows, scores = self.score_candidates(user, max_candidates)
+            exploration_rate = self.get_exploration_rate(user)
         
-        # Calculate scores for all candidates
-        scored_candidates = []
-        for candidate in candidates:
-            score = self.calculate_compatibility_score(user, candidate)
-            scored_candidates.append((candidate, score))
+        # Fresh results replace a stale feed entirely
+        slots = self.feed_size if feed.stale else self.feed_size - len(feed)
+        ranked_indices = self._rank_feed(scores, slots, exploration_rate)
+        feed.extend((self.user_profiles.user_ids[candidate_rows[index]] for index in ranked_indices), generation)
+    
+    def _user_lock(self, user_id: str) -> threading.Lock:
+        lock = self._user_locks.get(user_id)
+        if lock is None:
+            lock = self._user_locks.setdefault(user_id, threading.Lock())
+        return lock
+    
+    def _rank_feed(self, scores: np.ndarray, count: int, exploration_rate: float) -> List[int]:
+        """Order count candidates for a feed, applying the epsilon-greedy choice slot by slot."""
+        if count <= 0 or len(scores) == 0:
+            return []
+        
+        top_candidate_count = max(1, len(scores) // 5)
+        remaining = self.top_k_indices(scores, max(count, top_candidate_count))
+        
+        ranked = []
+        while remaining and len(ranked) < count:
+            if random.random() < exploration_rate:
+                # Exploration: any of the top 20% still available
+                choice = random.randrange(min(top_candidate_count, len(remaining)))
+            else:
+                # Exploitation: best remaining candidate
+                choice = 0
+            ranked.append(remaining.pop(choice))
+        
+        return ranked
+    
+    def _schedule_refill(self, user_id: str, feed: RecommendationFeed):
+        """Refill a feed off the calling thread, or inline when background refills are disabled."""
+        if not self.background_refill:
+            self.refill_feed(user_id)
+            return
         
-        # Sort by score (highest first)
-        scored_candidates.sort(key=lambda x: x[1], reverse=True)
+        if self._refill_executor is None:
+            self._refill_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='feed-refill')
         
-        # Apply exploration strategy (epsilon-greedy)
-        exploration_rate = self.get_exploration_rate(user)
+        feed.refill_pending = True
         
-        if random.random() < exploration_rate:
-            # Exploration: Select from top 20%
-            top_candidate_count = max(1, len(scored_candidates) // 5)
-            exploration_pool = scored_candidates[:top_candidate_count]
-            return random.choice(exploration_pool)[0]
-        else:
-            # Exploitation: Select highest scoring candidate
-            return scored_candidates[0][0]
+        def refill():
+            try:
+                self.refill_feed(user_id)
+            finally:
+                feed.refill_pending = False
+        
+        def report_failure(future):
+            # Nobody waits on the future, so a failed refill would otherwise vanish
+            if not future.cancelled() and future.exception() is not None:
+                logger.error("Background feed refill failed for %s", user_id, exc_info=future.exception())
+        
+        self._refill_executor.submit(refill).add_done_callback(report_failure)
+    
+    def close(self):
+        """Stop the background refill worker."""
+        if self._refill_executor is not None:
+            self._refill_executor.shutdown(wait=True)
+            self._refill_executor = None
+    
+    def generate_candidates(self, user: UserProfile, seen_profile_ids: Set[str], max_candidates: int) -> List[int]:
+        """Pick up to max_candidates unseen store rows, drawing from the most relevant postings first.
+        
+        Same university, then shared interests, then the rest of the user's city; other
+        cities only top up the pool when the city cannot fill it. The user is never a candidate.
+        """
+        # Each tier is only built once the tiers before it have fallen short
+        tiers = (
+            lambda: self.candidate_index.same_university(user.city, user.university),
+            lambda: self.candidate_index.shared_interests(user.city, user.interests),
+            lambda: self.candidate_index.same_city(user.city)
+        )
+        
+        selected_rows = []
+        # Rows already selected, plus the user's own row
+        selected_row_set = set()
+        if user.user_id in self.user_profiles:
+            selected_row_set.add(self.user_profiles.row(user.user_id))
+        
+        for build_tier in tiers:
+            remaining = max_candidates - len(selected_rows)
+            if remaining <= 0:
+                break
+            
+            # Random sample within a tier keeps exploration across equally relevant profiles
+            selected_rows.extend(self._sample_rows(list(build_tier()), seen_profile_ids, selected_row_set, remaining))
+        
+        remaining = max_candidates - len(selected_rows)
+        if remaining > 0:
+            selected_rows.extend(self._sample_rows(range(len(self.user_profiles)), seen_profile_ids, selected_row_set, remaining))
+        
+        return selected_rows
+    
+    def _sample_rows(self, population: Sequence[int], seen_profile_ids: Set[str],
+                     selected_row_set: Set[int], count: int) -> List[int]:
+        """Sample up to count rows of population that are neither seen nor already selected.
+        
+        Sampled rows are added to selected_row_set.
+        """
+        user_ids = self.user_profiles.user_ids
+        sampled_rows = []
+        
+        if len(population) > count:
+            # Rejection sampling is cheap while most of the population is still eligible
+            attempts = count * 4
+            while len(sampled_rows) < count and attempts > 0:
+                attempts -= 1
+                row = population[random.randrange(len(population))]
+                if row not in selected_row_set and user_ids[row] not in seen_profile_ids:
+                    sampled_rows.append(row)
+                    selected_row_set.add(row)
+        
+        if len(sampled_rows) < count:
+            # Small or mostly exhausted population - fall back to a scan
+            remaining_rows = [
+                row for row in population
+                if row not in selected_row_set and user_ids[row] not in seen_profile_ids
+            ]
+            if len(remaining_rows) > count - len(sampled_rows):
+                remaining_rows = random.sample(remaining_rows, count - len(sampled_rows))
+            sampled_rows.extend(remaining_rows)
+            selected_row_set.update(remaining_rows)
+        
+        return sampled_rows
     
     def update_user_feedback(self, user_id: str, candidate_id: str, liked: bool):
         """Update user preferences based on like/dislike feedback."""
         if user_id not in self.user_profiles:
             return
         
-        user = self.user_profiles[user_id]
-        
-        if liked:
-            user.liked_profiles.append(candidate_id)
-        else:
-            user.disliked_profiles.append(candidate_id)
-        
-        # Update behavioral model
-        self.update_behavioral_model(user_id)
+        # Only this user's own refill reads their feedback, so other users' refills do not block it
+        with self._user_lock(user_id):
+            user = self.user_profiles[user_id]
+            
+            if liked:
+                user.liked_profiles.append(candidate_id)
+            else:
+                user.disliked_profiles.append(candidate_id)
+            
+            # Update behavioral model
+            self.update_behavioral_model(user_id, candidate_id, liked)
+        
+        feed = self.feeds.get(user_id)
+        if feed is not None:
+            if liked:
+                # A like shifts the behavioral and diversity windows, so queued rankings are stale.
+                # Keep serving them until a background refill replaces them.
+                feed.invalidate()
+                if not feed.refill_pending:
+                    self._schedule_refill(user_id, feed)
+            else:
+                feed.discard(candidate_id)
     
-    def update_behavioral_model(self, user_id: str):
+    def update_behavioral_model(self, user_id: str, candidate_id: Optional[str] = None, liked: bool = False):
         """Update the behavioral model for a user."""
         # In production, this would update ML models
         user = self.user_profiles[user_id]
+        
+        model = self.behavioral_models.get(user_id)
+        if model is not None and candidate_id is not None:
+            model.record(candidate_id, liked)
+        
         user.interaction_history['last_updated'] = 'now'
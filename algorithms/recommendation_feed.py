@@ -0,0 +1,66 @@
+import threading
+from collections import deque
+from typing import Iterable, List, Optional, Set
+
+
+class RecommendationFeed:
+    """Ranked queue of upcoming recommendations for one user.
+
+    Queue operations take a short lock of their own, so popping never waits on
+    scoring. Invalidation bumps the generation, which makes refills that were
+    scored against the old preferences discard their results. The stale entries
+    keep being served until a refill of the new generation replaces them.
+    """
+
+    def __init__(self):
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.refill_pending = False
+        self.stale = False
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def pop(self, seen_profile_ids: Set[str]) -> Optional[str]:
+        """Pop the next queued user_id the user has not seen yet."""
+        with self._lock:
+            while self._queue:
+                profile_id = self._queue.popleft()
+                if profile_id not in seen_profile_ids:
+                    return profile_id
+        return None
+
+    def extend(self, profile_ids: Iterable[str], generation: int) -> bool:
+        """Append refill results unless the feed was invalidated after they were scored.
+
+        Results for an invalidated feed replace its stale entries.
+        """
+        with self._lock:
+            if generation != self.generation:
+                return False
+            if self.stale:
+                self._queue.clear()
+                self.stale = False
+            queued = set(self._queue)
+            self._queue.extend(profile_id for profile_id in profile_ids if profile_id not in queued)
+            return True
+
+    def discard(self, profile_id: str):
+        """Drop one profile from the queue."""
+        with self._lock:
+            try:
+                self._queue.remove(profile_id)
+            except ValueError:
+                pass
+
+    def invalidate(self):
+        """Mark the queue stale and reject refills that are still in flight."""
+        with self._lock:
+            self.stale = True
+            self.generation += 1
+
+    def snapshot(self) -> List[str]:
+        """Queued user_ids in order."""
+        with self._lock:
+            return list(self._queue)
@@ -0,0 +1,54 @@
+import time
+from typing import Optional
+
+
+class SearchBudget:
+    """Wall-clock and evaluation budget shared by the group searches of one formation run.
+
+    Searches call spend() for every group they score and stop as soon as it
+    returns False, keeping the best valid groups found so far. A budget with
+    neither limit never runs out.
+    """
+
+    def __init__(self, deadline_ms: Optional[float] = None, max_evaluations: Optional[int] = None):
+        self.started_at = time.perf_counter()
+        self.deadline = self.started_at + deadline_ms / 1000 if deadline_ms is not None else None
+        self.max_evaluations = max_evaluations
+        self.evaluations = 0
+
+        # Set once a search has been cut short by this budget
+        self.interrupted = False
+
+    @property
+    def exhausted(self) -> bool:
+        if self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            return True
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def spend(self, evaluations: int = 1) -> bool:
+        """Charge group evaluations; False (and interrupted) if the budget was already used up."""
+        if self.exhausted:
+            self.interrupted = True
+            return False
+        self.evaluations += evaluations
+        return True
+
+    def reserve_ms(self, reserved_ms: float):
+        """Bring the deadline forward to leave time for work that follows the search."""
+        if self.deadline is not None:
+            self.deadline -= reserved_ms / 1000
+
+    def remaining_evaluations(self) -> Optional[int]:
+        """Evaluations left, or None without an evaluation limit."""
+        if self.max_evaluations is None:
+            return None
+        return max(self.max_evaluations - self.evaluations, 0)
+
+    def remaining_ms(self) -> Optional[float]:
+        """Milliseconds until the deadline, or None without one."""
+        if self.deadline is None:
+            return None
+        return max((self.deadline - time.perf_counter()) * 1000, 0.0)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started_at) * 1000
@@ -0,0 +1,100 @@
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, Optional, Tuple
+
+
+class PairSimilarityCache:
+    """Symmetric, size-bounded LRU cache of pairwise similarity scores keyed by user_id.
+
+    Safe to share between the request path and background feed refills: every
+    operation holds one lock, since the LRU reordering and the per-user index
+    change the dicts even on a lookup.
+    """
+
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self._entries: 'OrderedDict[Tuple[str, str], float]' = OrderedDict()
+        self._pairs_by_user = defaultdict(set)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(user_id1: str, user_id2: str) -> Tuple[str, str]:
+        """Order-independent key, so (a, b) and (b, a) share an entry."""
+        return (user_id1, user_id2) if user_id1 <= user_id2 else (user_id2, user_id1)
+
+    def get(self, user_id1: str, user_id2: str) -> Optional[float]:
+        """Return the cached similarity for a pair, or None on a miss."""
+        key = self._key(user_id1, user_id2)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, user_id1: str, user_id2: str, value: float):
+        """Store the similarity for a pair, evicting the least recently used entries if full."""
+        if self.max_size <= 0:
+            return
+
+        key = self._key(user_id1, user_id2)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._pairs_by_user[key[0]].add(key)
+            self._pairs_by_user[key[1]].add(key)
+
+            while len(self._entries) > self.max_size:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self._forget_pair(evicted_key)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> int:
+        """Drop every cached pair involving the user, returning how many were removed."""
+        with self._lock:
+            keys = self._pairs_by_user.pop(user_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+                self._forget_pair(key)
+            return len(keys)
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._pairs_by_user.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def _forget_pair(self, key: Tuple[str, str]):
+        """Remove a pair from the per-user index. Callers hold the lock."""
+        for user_id in key:
+            user_pairs = self._pairs_by_user.get(user_id)
+            if user_pairs is not None:
+                user_pairs.discard(key)
+                if not user_pairs:
+                    del self._pairs_by_user[user_id]
+
+    def stats(self) -> Dict:
+        """Current hit/miss counters and occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions
+            }
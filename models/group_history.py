@@ -0,0 +1,116 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+
+class UserGroupHistory:
+    """How many groups a user has dined in, and who they dined with most recently."""
+
+    __slots__ = ('group_count', 'recent_co_diners', 'last_group_at')
+
+    def __init__(self, group_count: int = 0, recent_co_diners: Iterable[str] = (),
+                 last_group_at: Optional[float] = None, recent_limit: int = 20):
+        self.group_count = group_count
+        self.recent_co_diners = deque(recent_co_diners, maxlen=recent_limit)
+        self.last_group_at = last_group_at
+
+
+class GroupHistory:
+    """Compact per-user dining history: a group counter and a bounded ring of recent co-diners.
+
+    With a path, history is persisted to SQLite. Users are loaded on first
+    access rather than at startup, and every recorded formation is written in
+    one transaction, so fairness state survives restarts. Without a path it
+    lives in memory only.
+    """
+
+    def __init__(self, path: Optional[str] = None, recent_limit: int = 20):
+        self.path = path
+        self.recent_limit = recent_limit
+        self._users: Dict[str, UserGroupHistory] = {}
+        self._lock = threading.Lock()
+
+        self._connection = None
+        if path is not None:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS group_history ("
+                "user_id TEXT PRIMARY KEY, "
+                "group_count INTEGER NOT NULL, "
+                "recent_co_diners TEXT NOT NULL, "
+                "last_group_at REAL)"
+            )
+            self._connection.commit()
+
+    def _load(self, user_id: str) -> Optional[UserGroupHistory]:
+        """Cached history for a user, reading it from disk on first access."""
+        history = self._users.get(user_id)
+        if history is not None or self._connection is None:
+            return history
+
+        row = self._connection.execute(
+            "SELECT group_count, recent_co_diners, last_group_at FROM group_history WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        group_count, recent_co_diners, last_group_at = row
+        history = UserGroupHistory(group_count, json.loads(recent_co_diners), last_group_at, self.recent_limit)
+        self._users[user_id] = history
+        return history
+
+    def get(self, user_id: str) -> Optional[UserGroupHistory]:
+        """A user's history, or None if they have never been placed in a group."""
+        with self._lock:
+            return self._load(user_id)
+
+    def group_count(self, user_id: str) -> int:
+        """Number of groups the user has been placed in."""
+        history = self.get(user_id)
+        return history.group_count if history is not None else 0
+
+    def recent_co_diners(self, user_id: str) -> List[str]:
+        """Most recent co-diners, oldest first, up to recent_limit."""
+        history = self.get(user_id)
+        return list(history.recent_co_diners) if history is not None else []
+
+    def record_groups(self, groups: Iterable[List[str]], timestamp: Optional[float] = None):
+        """Record one formation round, given each group as a list of user_ids."""
+        timestamp = time.time() if timestamp is None else timestamp
+
+        with self._lock:
+            updated = {}
+            for member_ids in groups:
+                for user_id in member_ids:
+                    history = self._load(user_id)
+                    if history is None:
+                        history = self._users[user_id] = UserGroupHistory(recent_limit=self.recent_limit)
+                    history.group_count += 1
+                    history.recent_co_diners.extend(
+                        co_diner_id for co_diner_id in member_ids if co_diner_id != user_id
+                    )
+                    history.last_group_at = timestamp
+                    updated[user_id] = history
+
+            if self._connection is not None and updated:
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO group_history "
+                        "(user_id, group_count, recent_co_diners, last_group_at) VALUES (?, ?, ?, ?)",
+                        [
+                            (user_id, history.group_count, json.dumps(list(history.recent_co_diners)),
+                             history.last_group_at)
+                            for user_id, history in updated.items()
+                        ]
+                    )
+
+    def close(self):
+        """Close the SQLite connection, if any."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,276 @@
+from collections.abc import Mapping
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from models.user_profile import UserProfile
+from models.vocabulary import INTEREST_VOCABULARY, WORD_BITS, Vocabulary, mask_to_words, words_to_mask, word_count
+
+
+# Categorical UserProfile fields stored as interned integer codes
+CATEGORICAL_FIELDS = (
+    'gender', 'city', 'university', 'degree',
+    'dietary_restrictions', 'budget_range', 'relationship_status'
+)
+
+
+class ProfileStore(Mapping):
+    """Columnar, array-backed store of user profiles keyed by user_id.
+
+    Categorical fields are interned to integer codes and interests/languages are
+    stored as bitmasks, so each profile is a row across contiguous arrays instead
+    of a dataclass instance. Lookups return ProfileView objects that behave like
+    UserProfile for existing callers.
+
+    Views read single elements with ndarray.item(), which returns a Python
+    scalar without building a NumPy one, and decode categorical codes by
+    indexing the vocabulary's value list.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self.capacity = max(initial_capacity, 1)
+        self.size = 0
+        # Incremented on every insert or replace, so derived encodings can detect staleness
+        self.revision = 0
+
+        self._rows: Dict[str, int] = {}
+        self.user_ids: List[str] = []
+
+        self.vocabularies = {field: Vocabulary() for field in CATEGORICAL_FIELDS}
+        self.codes = {field: np.zeros(self.capacity, dtype=np.int32) for field in CATEGORICAL_FIELDS}
+
+        self.ages = np.zeros(self.capacity, dtype=np.int16)
+        self.graduation_years = np.zeros(self.capacity, dtype=np.int16)
+        self.alcohol = np.zeros(self.capacity, dtype=bool)
+
+        self.interest_vocabulary = INTEREST_VOCABULARY
+        self.language_vocabulary = Vocabulary()
+        self.interest_words = np.zeros((self.capacity, 1), dtype=np.uint64)
+        self.language_words = np.zeros((self.capacity, 1), dtype=np.uint64)
+
+        self.bios: List[str] = []
+
+        # Behavioral containers are kept by reference so that feedback recorded
+        # through the store stays visible on the UserProfile that was added
+        self.liked_profiles: List[List[str]] = []
+        self.disliked_profiles: List[List[str]] = []
+        self.interaction_histories: List[Dict] = []
+
+    def __getitem__(self, user_id: str) -> 'ProfileView':
+        return ProfileView(self, self._rows[user_id])
+
+    def __contains__(self, user_id) -> bool:
+        return user_id in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.user_ids)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def row(self, user_id: str) -> int:
+        """Return the row index for a user_id."""
+        return self._rows[user_id]
+
+    def view(self, row: int) -> 'ProfileView':
+        """Return a UserProfile-compatible view of a row."""
+        return ProfileView(self, row)
+
+    def add(self, user: UserProfile) -> int:
+        """Insert or replace a profile, returning its row index."""
+        row = self._rows.get(user.user_id)
+        if row is None:
+            row = self.size
+            if row == self.capacity:
+                self._grow(self.capacity * 2)
+            self._rows[user.user_id] = row
+            self.user_ids.append(user.user_id)
+            self.bios.append(user.bio)
+            self.liked_profiles.append(user.liked_profiles)
+            self.disliked_profiles.append(user.disliked_profiles)
+            self.interaction_histories.append(user.interaction_history)
+            self.size += 1
+        else:
+            self.bios[row] = user.bio
+            self.liked_profiles[row] = user.liked_profiles
+            self.disliked_profiles[row] = user.disliked_profiles
+            self.interaction_histories[row] = user.interaction_history
+        self.revision += 1
+
+        for field in CATEGORICAL_FIELDS:
+            self.codes[field][row] = self.vocabularies[field].intern(getattr(user, field))
+
+        self.ages[row] = user.age
+        self.graduation_years[row] = user.graduation_year
+        self.alcohol[row] = user.alcohol
+
+        interest_mask = user.interest_mask
+        language_mask = self.language_vocabulary.mask(user.languages, intern=True)
+        self.interest_words = self._fit_words(self.interest_words, self.interest_vocabulary)
+        self.language_words = self._fit_words(self.language_words, self.language_vocabulary)
+        self.interest_words[row] = mask_to_words(interest_mask, self.interest_words.shape[1])
+        self.language_words[row] = mask_to_words(language_mask, self.language_words.shape[1])
+
+        return row
+
+    def _grow(self, new_capacity: int):
+        """Reallocate every column with a larger capacity."""
+        def grown(column: np.ndarray) -> np.ndarray:
+            new_column = np.zeros((new_capacity,) + column.shape[1:], dtype=column.dtype)
+            new_column[:self.capacity] = column
+            return new_column
+
+        self.codes = {field: grown(column) for field, column in self.codes.items()}
+        self.ages = grown(self.ages)
+        self.graduation_years = grown(self.graduation_years)
+        self.alcohol = grown(self.alcohol)
+        self.interest_words = grown(self.interest_words)
+        self.language_words = grown(self.language_words)
+        self.capacity = new_capacity
+
+    def _fit_words(self, words: np.ndarray, vocabulary: Vocabulary) -> np.ndarray:
+        """Widen a bitmask column when its vocabulary outgrows the current word count."""
+        needed_words = word_count(len(vocabulary))
+        if needed_words <= words.shape[1]:
+            return words
+        widened = np.zeros((words.shape[0], needed_words), dtype=np.uint64)
+        widened[:, :words.shape[1]] = words
+        return widened
+
+    def categorical_value(self, field: str, row: int) -> str:
+        """Decode a categorical field for a row."""
+        return self.vocabularies[field].values[self.codes[field].item(row)]
+
+    def interest_mask(self, row: int) -> int:
+        """Interest bitmask for a row as an integer."""
+        words = self.interest_words
+        if words.shape[1] == 1:
+            return words.item(row, 0)
+        mask = 0
+        for index in range(words.shape[1]):
+            mask |= words.item(row, index) << (WORD_BITS * index)
+        return mask
+
+    def language_mask(self, row: int) -> int:
+        """Language bitmask for a row as an integer."""
+        return words_to_mask(self.language_words[row])
+
+
+class ProfileView:
+    """Read-only UserProfile-compatible view of one ProfileStore row.
+
+    Interests and languages are decoded from bitmasks in vocabulary order, so
+    duplicates and the original list order are not preserved. The behavioral
+    lists and interaction history are the stored objects and can be mutated.
+    """
+
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store: ProfileStore, row: int):
+        self.store = store
+        self.row = row
+
+    def __repr__(self) -> str:
+        return f"ProfileView(user_id={self.user_id!r})"
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ProfileView):
+            return self.store is other.store and self.row == other.row
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((id(self.store), self.row))
+
+    @property
+    def user_id(self) -> str:
+        return self.store.user_ids[self.row]
+
+    @property
+    def age(self) -> int:
+        return self.store.ages.item(self.row)
+
+    @property
+    def gender(self) -> str:
+        return self.store.categorical_value('gender', self.row)
+
+    @property
+    def city(self) -> str:
+        return self.store.categorical_value('city', self.row)
+
+    @property
+    def university(self) -> str:
+        return self.store.categorical_value('university', self.row)
+
+    @property
+    def degree(self) -> str:
+        return self.store.categorical_value('degree', self.row)
+
+    @property
+    def graduation_year(self) -> int:
+        return self.store.graduation_years.item(self.row)
+
+    @property
+    def dietary_restrictions(self) -> str:
+        return self.store.categorical_value('dietary_restrictions', self.row)
+
+    @property
+    def budget_range(self) -> str:
+        return self.store.categorical_value('budget_range', self.row)
+
+    @property
+    def languages(self) -> List[str]:
+        return self.store.language_vocabulary.decode_mask(self.store.language_mask(self.row))
+
+    @property
+    def alcohol(self) -> bool:
+        return self.store.alcohol.item(self.row)
+
+    @property
+    def relationship_status(self) -> str:
+        return self.store.categorical_value('relationship_status', self.row)
+
+    @property
+    def interests(self) -> List[str]:
+        return self.store.interest_vocabulary.decode_mask(self.store.interest_mask(self.row))
+
+    @property
+    def interest_mask(self) -> int:
+        return self.store.interest_mask(self.row)
+
+    @property
+    def bio(self) -> str:
+        return self.store.bios[self.row]
+
+    @property
+    def liked_profiles(self) -> List[str]:
+        return self.store.liked_profiles[self.row]
+
+    @property
+    def disliked_profiles(self) -> List[str]:
+        return self.store.disliked_profiles[self.row]
+
+    @property
+    def interaction_history(self) -> Dict:
+        return self.store.interaction_histories[self.row]
+
+    def to_profile(self) -> UserProfile:
+        """Materialize the row as a standalone UserProfile."""
+        return UserProfile(
+            user_id=self.user_id,
+            age=self.age,
+            gender=self.gender,
+            city=self.city,
+            university=self.university,
+            degree=self.degree,
+            graduation_year=self.graduation_year,
+            dietary_restrictions=self.dietary_restrictions,
+            budget_range=self.budget_range,
+            languages=self.languages,
+            alcohol=self.alcohol,
+            relationship_status=self.relationship_status,
+            interests=self.interests,
+            bio=self.bio,
+            liked_profiles=self.liked_profiles,
+            disliked_profiles=self.disliked_profiles,
+            interaction_history=self.interaction_history,
+        )
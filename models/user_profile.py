@@ -1,10 +1,17 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 
+from models.vocabulary import INTEREST_VOCABULARY
+
 
 @dataclass
 class UserProfile:
-    """Represents a user profile with personal, academic, and preference data."""
+    """Represents a user profile with personal, academic, and preference data.
+    
+    interest_mask is a bitmask of interests over the shared INTEREST_VOCABULARY. It is
+    refreshed whenever interests is reassigned, so replace the list rather than
+    mutating it in place.
+    """
     
     user_id: str
     
@@ -32,8 +39,17 @@ class UserProfile:
     disliked_profiles: List[str] = None
     interaction_history: Dict = None
     
+    # Derived data
+    interest_mask: int = field(default=0, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name == 'interests':
+            super().__setattr__('interest_mask', INTEREST_VOCABULARY.mask(value, intern=True))
+    
     def __post_init__(self):
         """Initialize empty lists and dictionaries if not provided."""
+        self.interest_mask = INTEREST_VOCABULARY.mask(self.interests, intern=True)
         if self.liked_profiles is None:
             self.liked_profiles = []
         if self.disliked_profiles is None:
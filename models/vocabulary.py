@@ -0,0 +1,121 @@
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+WORD_BITS = 64
+
+# Set-bit count for every byte value, used to popcount uint64 words
+_POPCOUNT_TABLE = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+class Vocabulary:
+    """Interns string values into dense integer codes."""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self._codes: Dict[str, int] = {}
+        self._values: List[str] = []
+        for value in values:
+            self.intern(value)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._codes
+
+    def intern(self, value: str) -> int:
+        """Return the code for a value, assigning a new one if it is unseen."""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._values)
+            self._codes[value] = code
+            self._values.append(value)
+        return code
+
+    def code(self, value: str) -> int:
+        """Return the code for a value, or -1 if it is unknown."""
+        return self._codes.get(value, -1)
+
+    def value(self, code: int) -> str:
+        """Return the value for a code."""
+        return self._values[code]
+
+    @property
+    def values(self) -> List[str]:
+        """Interned values indexed by code. Treat as read-only."""
+        return self._values
+
+    def mask(self, values: Iterable[str], intern: bool = False) -> int:
+        """Encode values as a bitmask of their codes. Unknown values are skipped unless interned."""
+        mask = 0
+        for value in values:
+            code = self.intern(value) if intern else self._codes.get(value, -1)
+            if code >= 0:
+                mask |= 1 << code
+        return mask
+
+    def decode_mask(self, mask: int) -> List[str]:
+        """Decode a bitmask back into values, in code order."""
+        values = []
+        code = 0
+        while mask:
+            if mask & 1:
+                values.append(self._values[code])
+            mask >>= 1
+            code += 1
+        return values
+
+
+# Shared interest vocabulary, so interest bitmasks are comparable across profiles and stores
+INTEREST_VOCABULARY = Vocabulary()
+
+
+def word_count(vocabulary_size: int) -> int:
+    """Number of uint64 words needed to hold a bitmask over the vocabulary."""
+    return max(1, -(-vocabulary_size // WORD_BITS))
+
+
+def masks_word_count(masks: Iterable[int]) -> int:
+    """Number of uint64 words needed to hold every one of the bitmasks.
+
+    Depends only on the masks, not on the size of the vocabulary in this process,
+    which may be empty in a spawned worker that received already-encoded profiles.
+    """
+    return word_count(max((mask.bit_length() for mask in masks), default=0))
+
+
+def mask_to_words(mask: int, n_words: int) -> np.ndarray:
+    """Split an integer bitmask into little-endian uint64 words."""
+    return np.array(
+        [(mask >> (WORD_BITS * index)) & 0xFFFFFFFFFFFFFFFF for index in range(n_words)],
+        dtype=np.uint64
+    )
+
+
+def masks_to_words(masks: List[int], n_words: int) -> np.ndarray:
+    """Split many integer bitmasks into a (len(masks) x n_words) array of little-endian uint64 words."""
+    words = np.zeros((len(masks), n_words), dtype=np.uint64)
+    for index in range(n_words):
+        shift = WORD_BITS * index
+        words[:, index] = [(mask >> shift) & 0xFFFFFFFFFFFFFFFF for mask in masks]
+    return words
+
+
+def words_to_mask(words: np.ndarray) -> int:
+    """Join little-endian uint64 words back into an integer bitmask."""
+    mask = 0
+    for index, word in enumerate(words.tolist()):
+        mask |= word << (WORD_BITS * index)
+    return mask
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Count set bits across the last axis of a uint64 word array."""
+    if hasattr(np, 'bitwise_count'):
+        # Native popcount ufunc (NumPy 2.0+)
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+
+    byte_view = np.ascontiguousarray(words, dtype=np.uint64).view(np.uint8)
+    bit_counts = _POPCOUNT_TABLE[byte_view]
+    return bit_counts.reshape(words.shape[:-1] + (-1,)).sum(axis=-1, dtype=np.int64)
@@ -0,0 +1,67 @@
+import random
+
+import numpy as np
+
+from algorithms.batch_scoring import CandidateBatch
+from algorithms.profile_discovery import ProfileDiscoveryEngine
+from models.user_profile import UserProfile
+
+
+def create_engine(rng: random.Random) -> ProfileDiscoveryEngine:
+    """An engine of 20-60 users, some cold-start, some with likes and dislikes, some without interests."""
+    interests_pool = ["cooking", "hiking", "music", "art", "movies", "gaming", "yoga", "reading"]
+    user_count = rng.randint(20, 60)
+    user_ids = [f"user_{i}" for i in range(user_count)]
+
+    engine = ProfileDiscoveryEngine(similarity_cache_size=rng.choice([0, 50, 10_000]))
+    for user_id in user_ids:
+        # Feedback may point at profiles that were never registered
+        feedback_pool = user_ids + ["ghost_1", "ghost_2"]
+        liked_profiles = rng.sample(feedback_pool, rng.choice([0, 0, 1, 3, 12]))
+        disliked_profiles = rng.sample(feedback_pool, rng.choice([0, 2, 7]))
+        engine.add_user(UserProfile(
+            user_id=user_id,
+            age=rng.randint(19, 27),
+            gender=rng.choice(["male", "female"]),
+            city=rng.choice(["Delhi", "Mumbai", "Pune"]),
+            university=rng.choice(["DU", "IIT", "JNU"]),
+            degree=rng.choice(["CS", "EE", "Math"]),
+            graduation_year=rng.randint(2023, 2027),
+            dietary_restrictions="none",
+            budget_range="500-800",
+            languages=["English"],
+            alcohol=rng.choice([True, False]),
+            relationship_status="single",
+            interests=rng.sample(interests_pool, rng.choice([0, 1, 2, 4, 8])),
+            bio="",
+            liked_profiles=liked_profiles,
+            disliked_profiles=disliked_profiles,
+        ))
+    return engine
+
+
+def test_batch_scores_match_scalar_scores(cases: int = 200):
+    """calculate_compatibility_scores and each row of calculate_user_scores equal per-candidate scoring."""
+    for seed in range(cases):
+        rng = random.Random(seed)
+        engine = create_engine(rng)
+        store = engine.user_profiles
+
+        candidate_rows = rng.sample(range(len(store)), rng.randint(1, len(store)))
+        candidates = [store.view(row) for row in candidate_rows]
+        user_ids = rng.sample(list(store), rng.randint(1, 8))
+
+        user_scores = engine.calculate_user_scores(user_ids, CandidateBatch.from_store(store, np.array(candidate_rows)))
+
+        for user_id, matrix_row in zip(user_ids, user_scores):
+            user = store[user_id]
+            expected = [engine.calculate_compatibility_score(user, candidate) for candidate in candidates]
+            batch_scores = engine.calculate_compatibility_scores(user, candidates)
+
+            assert np.allclose(batch_scores, expected, rtol=0, atol=1e-12), f"seed {seed}, {user_id}"
+            assert np.allclose(matrix_row, expected, rtol=0, atol=1e-12), f"seed {seed}, {user_id}"
+
+
+if __name__ == "__main__":
+    test_batch_scores_match_scalar_scores()
+    print("Batch scoring matches per-candidate scoring")
@@ -0,0 +1,77 @@
+import itertools
+import random
+
+import numpy as np
+
+from algorithms.group_dining import GroupDiningMatcher
+from models.user_profile import UserProfile
+
+
+def create_bucket_users(rng: random.Random) -> list:
+    """One constraint bucket of 6-13 users drawing on 2-5 relationship statuses."""
+    interests_pool = ["cooking", "hiking", "music", "art", "movies", "gaming", "yoga", "reading"]
+    statuses = ["single", "in a relationship", "not looking", "married", "complicated"][:rng.randint(2, 5)]
+
+    users = []
+    for i in range(rng.randint(6, 13)):
+        interests = rng.sample(interests_pool, rng.randint(1, 4))
+        if rng.random() < 0.1:
+            interests = interests + interests[:1]  # Repeated entries count as extra mentions
+        users.append(UserProfile(
+            user_id=f"user_{i}",
+            age=rng.randint(20, 28),
+            gender=rng.choice(["male", "female"]),
+            city="Delhi",
+            university=rng.choice(["DU", "IIT", "JNU", "DTU"]),
+            degree="CS",
+            graduation_year=2025,
+            dietary_restrictions="none",
+            budget_range="500-800",
+            languages=["English"],
+            alcohol=rng.choice([True, False]),
+            relationship_status=rng.choice(statuses),
+            interests=interests,
+            bio=f"Bio {i}",
+        ))
+    return users
+
+
+def score_groups(matcher: GroupDiningMatcher, users: list, fairness_boosts: dict, groups: list) -> list:
+    """Fairness-adjusted scores of groups drawn from the bucket, from the vectorized scorer."""
+    bucket_positions = {user.user_id: position for position, user in enumerate(users)}
+    positions = np.array([[bucket_positions[user.user_id] for user in group] for group in groups], dtype=np.int64)
+    boosts = np.array([fairness_boosts[user.user_id] for user in users])
+    scores = matcher.calculate_group_scores(matcher.encode_bucket(users), positions)
+    return list(scores + boosts[positions].sum(axis=1)) if len(groups) else []
+
+
+def enumerate_bucket_groups(matcher: GroupDiningMatcher, users: list, fairness_boosts: dict) -> list:
+    """What form_dining_groups selects from every combination of the bucket."""
+    groups = [list(group) for group in itertools.combinations(users, 6)]
+    scored_groups = list(zip(groups, score_groups(matcher, users, fairness_boosts, groups)))
+    return matcher.select_non_overlapping_groups(scored_groups, 6)
+
+
+def test_exact_solver_matches_enumeration(cases: int = 1500):
+    """The branch-and-bound solver selects groups as good as full enumeration.
+
+    Groups are compared by score, since equal-scoring groups may come out in
+    either order once rounding is involved.
+    """
+    matcher = GroupDiningMatcher()
+
+    for seed in range(cases):
+        rng = random.Random(seed)
+        users = create_bucket_users(rng)
+        fairness_boosts = {user.user_id: rng.choice([0.0, 0.0, 0.015]) for user in users}
+
+        expected = score_groups(matcher, users, fairness_boosts, enumerate_bucket_groups(matcher, users, fairness_boosts))
+        solved = score_groups(matcher, users, fairness_boosts,
+                              [group for group, score in matcher.solve_bucket_exactly(users, 6, fairness_boosts)])
+
+        assert np.allclose(solved, expected, rtol=0, atol=1e-9), f"seed {seed}: {solved} != {expected}"
+
+
+if __name__ == "__main__":
+    test_exact_solver_matches_enumeration()
+    print("Exact solver matches full enumeration")
@@ -0,0 +1,100 @@
+import random
+
+import numpy as np
+
+from algorithms.group_dining import GroupDiningMatcher
+from models.user_profile import UserProfile
+
+
+def create_users(rng: random.Random, count: int, city: str = "Delhi", budget_range: str = "500-800") -> list:
+    """Users of one constraint bucket, some with repeated or no interests."""
+    interests_pool = ["cooking", "hiking", "music", "art", "movies", "gaming", "yoga", "reading"]
+
+    users = []
+    for i in range(count):
+        interests = rng.sample(interests_pool, rng.choice([0, 1, 2, 3, 5]))
+        if interests and rng.random() < 0.2:
+            interests = interests + rng.choices(interests, k=rng.randint(1, 3))  # Repeated mentions
+        users.append(UserProfile(
+            user_id=f"{city}_{budget_range}_{i}",
+            age=rng.randint(19, 30),
+            gender=rng.choice(["male", "female"]),
+            city=city,
+            university=rng.choice(["DU", "IIT", "JNU", "DTU"]),
+            degree="CS",
+            graduation_year=2025,
+            dietary_restrictions="none",
+            budget_range=budget_range,
+            languages=["English"],
+            alcohol=rng.choice([True, False]),
+            relationship_status=rng.choice(["single", "in a relationship", "not looking", "married"]),
+            interests=interests,
+            bio="",
+        ))
+    return users
+
+
+def test_vectorized_scores_match_group_score(cases: int = 300):
+    """calculate_group_scores equals calculate_group_score for every group of the batch."""
+    matcher = GroupDiningMatcher()
+
+    for seed in range(cases):
+        rng = random.Random(seed)
+        users = create_users(rng, rng.randint(2, 30))
+        group_size = rng.randint(2, min(len(users), 8))
+        positions = np.array([rng.sample(range(len(users)), group_size) for _ in range(rng.randint(1, 40))])
+
+        scores = matcher.calculate_group_scores(matcher.encode_bucket(users), positions)
+        expected = [matcher.calculate_group_score([users[position] for position in group]) for group in positions]
+
+        assert np.allclose(scores, expected, rtol=0, atol=1e-12), f"seed {seed}"
+
+
+def test_group_state_matches_full_rescoring(cases: int = 300):
+    """GroupScoreState scores after each add, remove and swap equal rescoring the members from scratch."""
+    matcher = GroupDiningMatcher()
+
+    for seed in range(cases):
+        rng = random.Random(seed)
+        users = create_users(rng, 16)
+        members = rng.sample(users, rng.randint(2, 8))
+        state = matcher.create_group_state(members)
+
+        for step in range(30):
+            outsiders = [user for user in users if user not in state.members]
+            operation = rng.choice(["add", "remove", "swap"])
+            if operation == "add" and len(state) < 8:
+                score = state.add_member(rng.choice(outsiders))
+            elif operation == "remove" and len(state) > 2:
+                score = state.remove_member(rng.choice(state.members))
+            else:
+                score = state.swap_member(rng.choice(state.members), rng.choice(outsiders))
+
+            expected = matcher.calculate_group_score(state.members)
+            assert abs(score - expected) <= 1e-9, f"seed {seed}, step {step}: {score} != {expected}"
+
+
+def test_pool_matches_serial_formation(cases: int = 3):
+    """form_dining_groups with workers > 1 returns the same groups as a serial run."""
+    for seed in range(cases):
+        rng = random.Random(seed)
+        # Buckets both above and below the exact search size
+        users = [
+            user for city, count in [("Delhi", 45), ("Mumbai", 14), ("Pune", 30), ("Goa", 8)]
+            for user in create_users(rng, count, city)
+        ]
+
+        formed = []
+        for workers in (1, 2):
+            random.seed(seed)
+            groups = GroupDiningMatcher().form_dining_groups(users, strategy='sampling', workers=workers)
+            formed.append([[user.user_id for user in group] for group in groups])
+
+        assert formed[0] == formed[1], f"seed {seed}"
+
+
+if __name__ == "__main__":
+    test_vectorized_scores_match_group_score()
+    test_group_state_matches_full_rescoring()
+    test_pool_matches_serial_formation()
+    print("Group scoring paths agree")
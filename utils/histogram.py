@@ -0,0 +1,115 @@
+import math
+from typing import Dict
+
+
+class LatencyHistogram:
+    """Fixed-memory latency histogram with logarithmic buckets, in the style of HdrHistogram.
+
+    Bucket boundaries grow geometrically, so every recorded value falls in a
+    bucket whose midpoint is within relative_accuracy of it, whatever its
+    magnitude. Only buckets that have been hit are stored, so memory is bounded
+    by the accuracy and the covered range and, in practice, by the spread of the
+    recorded values, not by how many there are. Histograms with the same layout
+    merge by adding bucket counts, so per-worker histograms combine exactly.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value_ms: float = 0.001,
+                 max_value_ms: float = 3_600_000.0):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        if not 0 < min_value_ms < max_value_ms:
+            raise ValueError("min_value_ms must be positive and below max_value_ms")
+
+        self.relative_accuracy = relative_accuracy
+        self.min_value_ms = min_value_ms
+        self.max_value_ms = max_value_ms
+
+        # Bucket i covers [min_value * gamma^i, min_value * gamma^(i+1)); values below min_value go to bucket 0
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._last_index = self._bucket_index(max_value_ms)
+        # Sparse bucket counts: bucket index -> count, for buckets that have been hit
+        self.counts: Dict[int, int] = {}
+
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _bucket_index(self, value_ms: float) -> int:
+        if value_ms <= self.min_value_ms:
+            return 0
+        return int(math.log(value_ms / self.min_value_ms) / self._log_gamma)
+
+    def bucket_index(self, value_ms: float) -> int:
+        """Bucket a value falls in, for record_in_bucket on histograms sharing this layout."""
+        return min(self._bucket_index(value_ms), self._last_index)
+
+    def _bucket_value(self, index: int) -> float:
+        """Midpoint of a bucket, within relative_accuracy of anything recorded in it."""
+        lower = self.min_value_ms * self._gamma ** index
+        return lower * 2 * self._gamma / (1 + self._gamma)
+
+    def record(self, value_ms: float):
+        """Record one latency; values beyond the covered range land in the edge buckets."""
+        self.record_in_bucket(self.bucket_index(value_ms), value_ms)
+
+    def record_in_bucket(self, index: int, value_ms: float):
+        """Record a latency whose bucket_index is already known."""
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + 1
+
+        self.count += 1
+        self.total += value_ms
+        if value_ms < self.min:
+            self.min = value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> float:
+        """Approximate value at a percentile between 0 and 100; 0.0 when empty."""
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(self.count * percentile / 100), 1)
+
+        seen = 0
+        for index, bucket_count in sorted(self.counts.items()):
+            seen += bucket_count
+            if seen >= rank:
+                # Exact extremes are known, so never report outside them
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Add another histogram's values into this one."""
+        if (other.relative_accuracy, other.min_value_ms, other.max_value_ms) != \
+                (self.relative_accuracy, self.min_value_ms, self.max_value_ms):
+            raise ValueError("Cannot merge histograms with different bucket layouts")
+
+        counts = self.counts
+        for index, other_count in list(other.counts.items()):
+            counts[index] = counts.get(index, 0) + other_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def copy(self) -> 'LatencyHistogram':
+        histogram = LatencyHistogram(self.relative_accuracy, self.min_value_ms, self.max_value_ms)
+        histogram.merge(self)
+        return histogram
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean and tail latencies in milliseconds."""
+        return {
+            'count': self.count,
+            'avg_latency_ms': self.mean,
+            'p50_latency_ms': self.percentile(50),
+            'p95_latency_ms': self.percentile(95),
+            'p99_latency_ms': self.percentile(99),
+            'max_latency_ms': self.max
+        }
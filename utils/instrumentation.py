@@ -0,0 +1,87 @@
+import functools
+import time
+from typing import Callable, Optional
+
+from utils.monitoring import AlgorithmMonitor
+
+
+# Monitor receiving stage timings; None while instrumentation is off
+_monitor: Optional[AlgorithmMonitor] = None
+
+
+def enable(monitor: AlgorithmMonitor):
+    """Start recording stage timings and call counts into the monitor."""
+    global _monitor
+    _monitor = monitor
+
+
+def disable():
+    """Stop recording. Stage markers then cost one global lookup."""
+    global _monitor
+    _monitor = None
+
+
+def is_enabled() -> bool:
+    return _monitor is not None
+
+
+class _Stage:
+    """Times one pass through a stage and records it on exit."""
+
+    __slots__ = ('name', 'monitor', 'started_at')
+
+    def __init__(self, name: str, monitor: AlgorithmMonitor):
+        self.name = name
+        self.monitor = monitor
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.monitor.record_stage(self.name, (time.perf_counter() - self.started_at) * 1000)
+        return False
+
+
+class _NullStage:
+    """Shared no-op stage handed out while instrumentation is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str):
+    """Context manager timing the enclosed block as one call of the named stage."""
+    monitor = _monitor
+    if monitor is None:
+        return _NULL_STAGE
+    return _Stage(name, monitor)
+
+
+def timed(name: str) -> Callable:
+    """Decorator timing every call of the function as the named stage.
+
+    The wrapper adds a function call even while instrumentation is off, so use it on
+    coarse stages, not on scorers called once per candidate or group.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            monitor = _monitor
+            if monitor is None:
+                return func(*args, **kwargs)
+            started_at = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                monitor.record_stage(name, (time.perf_counter() - started_at) * 1000)
+        return wrapper
+    return decorator
@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+from utils.histogram import LatencyHistogram
+from utils.monitoring import AlgorithmMonitor
+
+
+class MetricsExporter:
+    """Exports an AlgorithmMonitor as Prometheus text over HTTP and as periodic JSONL snapshots.
+
+    All work happens on the exporter's own daemon threads: the HTTP server
+    merges the monitor's shards when it is scraped, and the snapshot writer
+    wakes every snapshot_interval_s to append one line. Recording threads never
+    wait on serialization or I/O.
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, monitor: AlgorithmMonitor, host: str = '127.0.0.1', port: Optional[int] = 9464,
+                 snapshot_path: Optional[str] = None, snapshot_interval_s: float = 60.0):
+        self.monitor = monitor
+        self.host = host
+        self.port = port  # None disables the HTTP endpoint; 0 picks a free port
+        self.snapshot_path = snapshot_path  # None disables JSONL snapshots
+        self.snapshot_interval_s = snapshot_interval_s
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+
+    @property
+    def address(self) -> Optional[Tuple[str, int]]:
+        """(host, port) the HTTP endpoint is bound to, once started."""
+        return self._server.server_address[:2] if self._server is not None else None
+
+    def start(self) -> 'MetricsExporter':
+        """Start the HTTP endpoint and snapshot writer on daemon threads."""
+        if self._threads:
+            raise RuntimeError("MetricsExporter is already running")
+        self._stopping.clear()
+
+        if self.port is not None:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+            self._server.daemon_threads = True
+            self._threads.append(threading.Thread(
+                target=self._server.serve_forever, name='metrics-http', daemon=True
+            ))
+
+        if self.snapshot_path is not None:
+            self._threads.append(threading.Thread(
+                target=self._write_snapshots, name='metrics-snapshots', daemon=True
+            ))
+
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """Stop both threads, writing one last snapshot if snapshots are enabled."""
+        self._stopping.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._server = None
+
+    def _handler_class(self):
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes are too frequent to log
+
+        return MetricsHandler
+
+    def _write_snapshots(self):
+        while not self._stopping.wait(self.snapshot_interval_s):
+            self.write_snapshot()
+        self.write_snapshot()
+
+    def write_snapshot(self):
+        """Append the lifetime and per-window summaries as one JSON line."""
+        record = {
+            'timestamp': time.time(),
+            'lifetime': self.monitor.get_performance_summary(),
+            'windows': {window: self.monitor.get_performance_summary(window) for window in self.monitor.WINDOWS}
+        }
+        with open(self.snapshot_path, 'a', encoding='utf-8') as snapshot_file:
+            snapshot_file.write(json.dumps(record) + '\n')
+
+    def render_prometheus(self) -> str:
+        """Lifetime metrics in the Prometheus text exposition format."""
+        snapshot = self.monitor.snapshot()
+        profile_metrics = snapshot.metrics['profile_discovery']
+        group_metrics = snapshot.metrics['group_dining']
+        lines = []
+
+        self._counter(lines, 'profile_discovery_recommendations_total', 'Profile recommendations served.',
+                      profile_metrics['recommendations_served'])
+        self._counter(lines, 'profile_discovery_mutual_likes_total', 'Recommendations ending in a mutual like.',
+                      profile_metrics['mutual_likes'])
+        self._summary(lines, 'profile_discovery_latency_seconds', 'Profile recommendation latency.',
+                      [({}, profile_metrics['algorithm_latency'])])
+
+        self._counter(lines, 'group_dining_groups_formed_total', 'Dining groups formed.',
+                      group_metrics['groups_formed'])
+        lines.append('# HELP group_dining_satisfaction_rating Satisfaction ratings received.')
+        lines.append('# TYPE group_dining_satisfaction_rating summary')
+        lines.append(f"group_dining_satisfaction_rating_sum {group_metrics['satisfaction_total']}")
+        lines.append(f"group_dining_satisfaction_rating_count {group_metrics['satisfaction_count']}")
+        self._summary(lines, 'group_dining_latency_seconds', 'Group formation latency.',
+                      [({}, group_metrics['algorithm_latency'])])
+
+        if snapshot.stages:
+            self._summary(lines, 'algorithm_stage_latency_seconds', 'Latency of instrumented algorithm stages.',
+                          [({'stage': name}, histogram) for name, histogram in sorted(snapshot.stages.items())])
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _labels(labels: dict) -> str:
+        if not labels:
+            return ''
+        escaped = (
+            '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for name, value in labels.items()
+        )
+        return '{' + ','.join(escaped) + '}'
+
+    def _counter(self, lines: List[str], name: str, help_text: str, value: float):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name} {value}')
+
+    def _summary(self, lines: List[str], name: str, help_text: str, series: List[Tuple[dict, LatencyHistogram]]):
+        """Histograms as Prometheus summaries, converting milliseconds to seconds."""
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} summary')
+        for labels, histogram in series:
+            for quantile in self.QUANTILES:
+                quantile_labels = self._labels({**labels, 'quantile': quantile})
+                lines.append(f'{name}{quantile_labels} {histogram.percentile(quantile * 100) / 1000}')
+            lines.append(f'{name}_sum{self._labels(labels)} {histogram.total / 1000}')
+            lines.append(f'{name}_count{self._labels(labels)} {histogram.count}')
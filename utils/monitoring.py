@@ -1,59 +1,275 @@
-from typing import Dict
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
+from utils.histogram import LatencyHistogram
+from utils.sliding_window import SlidingWindow
 
-class AlgorithmMonitor:
-    """Monitor algorithm performance and user satisfaction metrics."""
+
+class WindowMetrics:
+    """Counters and latency histograms accumulated over one span of time."""
+    
+    __slots__ = ('recommendations_served', 'mutual_likes', 'profile_latency',
+                 'groups_formed', 'satisfaction_total', 'satisfaction_count', 'group_latency')
     
     def __init__(self):
+        self.recommendations_served = 0
+        self.mutual_likes = 0
+        self.profile_latency = LatencyHistogram()
+        self.groups_formed = 0
+        self.satisfaction_total = 0.0
+        self.satisfaction_count = 0
+        self.group_latency = LatencyHistogram()
+    
+    def merge(self, other: 'WindowMetrics'):
+        self.recommendations_served += other.recommendations_served
+        self.mutual_likes += other.mutual_likes
+        self.profile_latency.merge(other.profile_latency)
+        self.groups_formed += other.groups_formed
+        self.satisfaction_total += other.satisfaction_total
+        self.satisfaction_count += other.satisfaction_count
+        self.group_latency.merge(other.group_latency)
+
+
+class MetricsShard:
+    """Lifetime, per-stage and sliding-window metrics recorded by one thread."""
+    
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
         self.metrics = {
             'profile_discovery': {
                 'recommendations_served': 0,
                 'mutual_likes': 0,
-                'user_engagement_time': [],
-                'algorithm_latency': []
+                'algorithm_latency': LatencyHistogram()
             },
             'group_dining': {
                 'groups_formed': 0,
-                'satisfaction_ratings': [],
-                'rebooking_rates': [],
-                'algorithm_latency': []
+                'satisfaction_total': 0.0,
+                'satisfaction_count': 0,
+                'algorithm_latency': LatencyHistogram()
             }
         }
+        
+        # Per-stage timings from utils.instrumentation, keyed by stage name
+        self.stages: Dict[str, LatencyHistogram] = {}
+        
+        # Recent activity in fixed rings of time slots, one ring per window
+        self.windows: Dict[str, SlidingWindow[WindowMetrics]] = {
+            name: SlidingWindow(seconds, AlgorithmMonitor.SLOTS_PER_WINDOW, WindowMetrics, clock)
+            for name, seconds in AlgorithmMonitor.WINDOWS.items()
+        }
     
-    def log_profile_recommendation(self, latency_ms: float, user_engaged: bool, mutual_like: bool = False):
-        """Log profile discovery metrics."""
-        self.metrics['profile_discovery']['recommendations_served'] += 1
-        self.metrics['profile_discovery']['algorithm_latency'].append(latency_ms)
+    def log_profile_recommendation(self, latency_ms: float, mutual_like: bool):
+        metrics = self.metrics['profile_discovery']
+        metrics['recommendations_served'] += 1
+        # Every histogram shares one layout, so the bucket is found once per record
+        latency_bucket = metrics['algorithm_latency'].bucket_index(latency_ms)
+        metrics['algorithm_latency'].record_in_bucket(latency_bucket, latency_ms)
         
         if mutual_like:
-            self.metrics['profile_discovery']['mutual_likes'] += 1
+            metrics['mutual_likes'] += 1
+        
+        now = self.clock()
+        for window in self.windows.values():
+            slot = window.current(now)
+            slot.recommendations_served += 1
+            slot.profile_latency.record_in_bucket(latency_bucket, latency_ms)
+            if mutual_like:
+                slot.mutual_likes += 1
     
-    def log_group_formation(self, latency_ms: float, group_size: int, satisfaction_rating: float = None):
-        """Log group dining metrics."""
-        self.metrics['group_dining']['groups_formed'] += 1
-        self.metrics['group_dining']['algorithm_latency'].append(latency_ms)
+    def log_group_formation(self, latency_ms: float, satisfaction_rating: Optional[float]):
+        metrics = self.metrics['group_dining']
+        metrics['groups_formed'] += 1
+        latency_bucket = metrics['algorithm_latency'].bucket_index(latency_ms)
+        metrics['algorithm_latency'].record_in_bucket(latency_bucket, latency_ms)
         
         if satisfaction_rating:
-            self.metrics['group_dining']['satisfaction_ratings'].append(satisfaction_rating)
+            metrics['satisfaction_total'] += satisfaction_rating
+            metrics['satisfaction_count'] += 1
+        
+        now = self.clock()
+        for window in self.windows.values():
+            slot = window.current(now)
+            slot.groups_formed += 1
+            slot.group_latency.record_in_bucket(latency_bucket, latency_ms)
+            if satisfaction_rating:
+                slot.satisfaction_total += satisfaction_rating
+                slot.satisfaction_count += 1
+    
+    def record_stage(self, name: str, elapsed_ms: float):
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = LatencyHistogram()
+        histogram.record(elapsed_ms)
+    
+    def merge(self, other: 'MetricsShard'):
+        """Add another shard's metrics into this one: counters sum, histograms and windows merge.
+        
+        other may be a live shard whose thread is still recording, so its dicts are copied
+        before iterating.
+        """
+        for algorithm, metrics in list(other.metrics.items()):
+            for name, value in list(metrics.items()):
+                if isinstance(value, LatencyHistogram):
+                    self.metrics[algorithm][name].merge(value)
+                else:
+                    self.metrics[algorithm][name] += value
+        
+        for name, histogram in list(other.stages.items()):
+            if name in self.stages:
+                self.stages[name].merge(histogram)
+            else:
+                self.stages[name] = histogram.copy()
+        
+        for name, window in list(other.windows.items()):
+            self.windows[name].merge(window, WindowMetrics.merge)
+
+
+class AlgorithmMonitor:
+    """Monitor algorithm performance and user satisfaction metrics.
+    
+    Safe to share between threads: each thread records into its own MetricsShard
+    without locking, and reads merge every shard into a snapshot. Shards of
+    threads that have exited are folded into one retired shard, so totals stay
+    exact under thread churn. Worker processes can send snapshot() to a parent
+    monitor's merge().
+    
+    The design assumes long-lived worker threads, e.g. a thread pool. A thread's
+    first record still allocates and registers a shard, so a thread-per-request
+    server pays that on every request. Dead shards are retired at snapshot time,
+    or on registration once the shard list has doubled since the last retirement,
+    so registration stays amortized O(1).
+    """
+    
+    # Sliding windows reported alongside lifetime totals: name -> seconds covered
+    WINDOWS = {'1m': 60, '5m': 300, '1h': 3600}
+    SLOTS_PER_WINDOW = 12
+    # Registered shards tolerated before registration sweeps out those of exited threads
+    RETIRE_MIN_SHARDS = 64
     
-    def get_performance_summary(self) -> Dict:
-        """Get current performance summary."""
-        profile_metrics = self.metrics['profile_discovery']
-        group_metrics = self.metrics['group_dining']
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._local = threading.local()
+        
+        # (owning thread, shard) for every live thread that has recorded; guarded by _shards_lock
+        self._shards: List[Tuple[threading.Thread, MetricsShard]] = []
+        self._retired = MetricsShard(clock)
+        self._shards_lock = threading.Lock()
+        # Shard count at which registration next retires dead shards
+        self._retire_at = self.RETIRE_MIN_SHARDS
+    
+    def _shard(self) -> MetricsShard:
+        """The calling thread's shard, registering one on its first record."""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = MetricsShard(self.clock)
+            with self._shards_lock:
+                self._shards.append((threading.current_thread(), shard))
+                if len(self._shards) >= self._retire_at:
+                    self._retire_dead_shards()
+        return shard
+    
+    def _retire_dead_shards(self):
+        """Fold shards of exited threads into the retired shard; caller holds _shards_lock."""
+        live_shards = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live_shards.append((thread, shard))
+            else:
+                self._retired.merge(shard)
+        self._shards = live_shards
+        self._retire_at = max(2 * len(live_shards), self.RETIRE_MIN_SHARDS)
+    
+    def log_profile_recommendation(self, latency_ms: float, user_engaged: bool, mutual_like: bool = False):
+        """Log profile discovery metrics."""
+        self._shard().log_profile_recommendation(latency_ms, mutual_like)
+    
+    def log_group_formation(self, latency_ms: float, group_size: int, satisfaction_rating: float = None):
+        """Log group dining metrics."""
+        self._shard().log_group_formation(latency_ms, satisfaction_rating)
+    
+    def record_stage(self, name: str, elapsed_ms: float):
+        """Log one call of an instrumented stage."""
+        self._shard().record_stage(name, elapsed_ms)
+    
+    def snapshot(self) -> MetricsShard:
+        """All shards merged into one new shard."""
+        snapshot = MetricsShard(self.clock)
+        with self._shards_lock:
+            self._retire_dead_shards()
+            snapshot.merge(self._retired)
+            for _, shard in self._shards:
+                snapshot.merge(shard)
+        return snapshot
+    
+    @property
+    def metrics(self) -> Dict:
+        """Lifetime metrics merged across threads."""
+        return self.snapshot().metrics
+    
+    def merge(self, other: Union['AlgorithmMonitor', MetricsShard]):
+        """Fold in metrics collected by another monitor or shard, e.g. one per worker process."""
+        if isinstance(other, AlgorithmMonitor):
+            other = other.snapshot()
+        with self._shards_lock:
+            self._retired.merge(other)
+    
+    def get_performance_summary(self, window: Optional[str] = None) -> Dict:
+        """Get current performance summary.
+        
+        By default covers the monitor's lifetime. With a window name from WINDOWS
+        ('1m', '5m' or '1h'), covers only activity within that window instead.
+        """
+        snapshot = self.snapshot()
+        if window is not None:
+            return self._window_summary(snapshot, window)
+        
+        profile_metrics = snapshot.metrics['profile_discovery']
+        group_metrics = snapshot.metrics['group_dining']
         
         return {
             'profile_discovery': {
                 'total_recommendations': profile_metrics['recommendations_served'],
                 'mutual_like_rate': (profile_metrics['mutual_likes'] / 
                                    max(profile_metrics['recommendations_served'], 1)) * 100,
-                'avg_latency_ms': sum(profile_metrics['algorithm_latency']) / 
-                                max(len(profile_metrics['algorithm_latency']), 1)
+                **self._latency_summary(profile_metrics['algorithm_latency'])
             },
             'group_dining': {
                 'total_groups': group_metrics['groups_formed'],
-                'avg_satisfaction': sum(group_metrics['satisfaction_ratings']) / 
-                                 max(len(group_metrics['satisfaction_ratings']), 1),
-                'avg_latency_ms': sum(group_metrics['algorithm_latency']) / 
-                                max(len(group_metrics['algorithm_latency']), 1)
+                'avg_satisfaction': group_metrics['satisfaction_total'] / max(group_metrics['satisfaction_count'], 1),
+                **self._latency_summary(group_metrics['algorithm_latency'])
+            },
+            'stages': {
+                name: {'calls': histogram.count, **self._latency_summary(histogram)}
+                for name, histogram in sorted(snapshot.stages.items())
             }
         }
+    
+    def _window_summary(self, snapshot: MetricsShard, window: str) -> Dict:
+        """Performance summary over the live slots of one sliding window."""
+        if window not in snapshot.windows:
+            raise ValueError(f"Unknown window {window!r}, expected one of {list(self.WINDOWS)}")
+        
+        totals = WindowMetrics()
+        for slot in snapshot.windows[window].live_slots():
+            totals.merge(slot)
+        
+        return {
+            'window': window,
+            'profile_discovery': {
+                'total_recommendations': totals.recommendations_served,
+                'mutual_like_rate': (totals.mutual_likes / max(totals.recommendations_served, 1)) * 100,
+                **self._latency_summary(totals.profile_latency)
+            },
+            'group_dining': {
+                'total_groups': totals.groups_formed,
+                'avg_satisfaction': totals.satisfaction_total / max(totals.satisfaction_count, 1),
+                **self._latency_summary(totals.group_latency)
+            }
+        }
+    
+    def _latency_summary(self, histogram: LatencyHistogram) -> Dict:
+        """Mean and tail latencies from a latency histogram."""
+        summary = histogram.summary()
+        del summary['count']
+        return summary
@@ -0,0 +1,66 @@
+import time
+from typing import Callable, Generic, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class SlidingWindow(Generic[T]):
+    """Fixed ring of time slots covering roughly the last window_seconds.
+
+    Each slot accumulates whatever slot_factory builds (counters, histograms)
+    for one slot_seconds span. Slots are built on first use and replaced with a
+    fresh one once the ring wraps around to them. Recording touches only the
+    current slot, so updates are O(1) and memory is bounded by the ring, while
+    an idle window holds nothing. Readers combine the slots that are still
+    inside the window.
+    """
+
+    def __init__(self, window_seconds: float, slot_count: int, slot_factory: Callable[[], T],
+                 clock: Callable[[], float] = time.monotonic):
+        if window_seconds <= 0 or slot_count <= 0:
+            raise ValueError("window_seconds and slot_count must be positive")
+
+        self.window_seconds = window_seconds
+        self.slot_seconds = window_seconds / slot_count
+        self.slot_factory = slot_factory
+        self.clock = clock
+
+        self.slots: List[Optional[T]] = [None] * slot_count
+        # Absolute slot number each ring position currently holds, None if never used
+        self.slot_numbers: List[Optional[int]] = [None] * slot_count
+
+    def _slot_number(self, now: Optional[float] = None) -> int:
+        return int((self.clock() if now is None else now) // self.slot_seconds)
+
+    def current(self, now: Optional[float] = None) -> T:
+        """Slot for the current time, recycling the stale slot it replaces."""
+        slot_number = self._slot_number(now)
+        position = slot_number % len(self.slots)
+        if self.slot_numbers[position] != slot_number:
+            self.slots[position] = self.slot_factory()
+            self.slot_numbers[position] = slot_number
+        return self.slots[position]
+
+    def live_slots(self, now: Optional[float] = None) -> List[T]:
+        """Slots still inside the window."""
+        oldest = self._slot_number(now) - len(self.slots) + 1
+        return [
+            slot for slot_number, slot in zip(self.slot_numbers, self.slots)
+            if slot_number is not None and slot_number >= oldest
+        ]
+
+    def merge(self, other: 'SlidingWindow[T]', merge_slot: Callable[[T, T], None]):
+        """Fold in another window on the same clock and slot layout, slot by slot."""
+        if (other.window_seconds, len(other.slots)) != (self.window_seconds, len(self.slots)):
+            raise ValueError("Cannot merge sliding windows with different layouts")
+
+        for position, slot_number in enumerate(other.slot_numbers):
+            if slot_number is None:
+                continue
+            own_slot_number = self.slot_numbers[position]
+            if own_slot_number is not None and own_slot_number > slot_number:
+                continue  # Other slot is older than ours and already out of our window
+            if own_slot_number != slot_number:
+                self.slots[position] = self.slot_factory()
+                self.slot_numbers[position] = slot_number
+            merge_slot(self.slots[position], other.slots[position])